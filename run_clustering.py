@@ -1,25 +1,26 @@
 import os
 import shutil
 import sys
+import time
 from copy import deepcopy
-from typing import List
+from typing import Dict, List, Tuple
 
 from checks.tools import And, Or
-from controller.synthesis import create_controller_if_exists, SynthesisException
+from controller import clusters
+from controller.synthesis import create_controller_if_exists, SynthesisException, pretty_print_synthesis_phases
 from goals.cgtgoal import CGTGoal
 from goals.helpers import generate_general_controller_inputs_from_goal, generate_controller_input_text
 from goals.operations import create_contextual_clusters, create_cgt, CGTFailException, pretty_cgt_exception, \
     pretty_print_summary_clustering, conjunction
+from helper.profiling import profiler
+from helper.results import ResultsWriter, RESULTS_FILE, goal_sizes, phases_of
 from helper.tools import save_to_file
 
 from mission_specification import get_inputs
+from typescogomo.assumption import Context
 from typescogomo.formula import OrLTL
 
 results_path = os.path.dirname(os.path.abspath(__file__)) + "/output/results"
-try:
-    shutil.rmtree(results_path)
-except:
-    pass
 
 sys.path.append(os.path.join(os.getcwd(), os.path.pardir))
 
@@ -78,40 +79,37 @@ def create_general_controller_from_goals(goals: List[CGTGoal], folder_path: str,
 
 
 def generate_controller_from_cgt(cgt: CGTGoal, folder_path, complete):
-    assum, guaran, ins, outs = generate_general_controller_inputs_from_goal(ap, rules, cgt, complete)
-    save_to_file(generate_controller_input_text(assum, guaran, ins, outs),
-                 folder_path + "specification.txt")
+    return clusters.generate_controller_from_cgt(ap, rules, cgt, folder_path, complete)
 
-    exec_time = 0.0
-    realizable = False
-    try:
-        controller_generated, exec_time = create_controller_if_exists(folder_path + "specification.txt")
-        realizable = controller_generated
 
-    except SynthesisException as e:
-        if e.os_not_supported:
-            print("Os not supported for synthesis. Only linux can run strix")
-        elif e.trivial:
-            print("The assumptions are not satisfiable. The controller is trivial.")
-            raise Exception("Assumptions unsatisfiable in a CGT is impossible.")
+def generate_controllers_from_cgt_clustered(cgt: CGTGoal, folder_path, complete, workers: int = None):
+    return clusters.generate_controllers_from_cgt_clustered(ap, rules, cgt, folder_path, complete, workers)
 
-    return realizable, exec_time
 
-
-def generate_controllers_from_cgt_clustered(cgt: CGTGoal, folder_path, complete):
-    realizables = []
-    exec_times = []
-    """Synthetize the controller for the branches of the CGT"""
-    print("\n\nSynthetize the controller for the branches of the CGT composing it with the new context")
+def write_clusters_results(results: ResultsWriter, mode: str, cgt: CGTGoal, realizables: List[bool],
+                           exec_times: List[float], folder_path: str, compose_time: float, n_contexts: int,
+                           timed_out: List[Tuple[Context, List[CGTGoal]]]):
     for i, goal in enumerate(cgt.refined_by):
-        from helper.buchi import generate_buchi
-        sub_folder_path = folder_path + "cluster_" + str(i) + "/"
-        generate_buchi(OrLTL(goal.context), sub_folder_path + "context")
-        realizable, exec_time = generate_controller_from_cgt(goal, sub_folder_path, complete)
-        realizables.append(realizable)
-        exec_times.append(exec_time)
-
-    return realizables, exec_times
+        results.write("cluster", mode=mode, cluster=i, context=str(goal.goal_context_to_show.formula),
+                      goals=[g.name for g in goal.refined_by], realizable=realizables[i],
+                      synthesis_time=exec_times[i],
+                      phases=phases_of(folder_path + "cluster_" + str(i) + "/specification.txt"), **goal_sizes(goal))
+    for ctx, goals in timed_out:
+        results.write("cluster", mode=mode, context=str(ctx.formula), goals=[g.name for g in goals], timeout=True)
+    results.write("clusters", mode=mode, contexts=n_contexts, feasible=len(cgt.refined_by),
+                  timed_out=len(timed_out), realizable=sum(realizables), compose_time=compose_time,
+                  synthesis_time=sum(exec_times))
+
+
+def pretty_print_timed_out_clusters(timed_out: List[Tuple[Context, List[CGTGoal]]]) -> str:
+    """The clusters left out of the CGT because their composition timed out"""
+    if len(timed_out) == 0:
+        return ""
+    ret = "\nTIMED OUT CLUSTERS:\t " + str(len(timed_out)) + " (not in the CGT)"
+    for ctx, goals in timed_out:
+        ret += "\nSCENARIO:\t" + str(ctx.formula) + "\n-->\t" + str(len(goals)) + " goals: " + str(
+            [g.name for g in goals]) + "\n"
+    return ret
 
 
 def run(list_of_goals: List[CGTGoal], result_folder: str,
@@ -120,11 +118,19 @@ def run(list_of_goals: List[CGTGoal], result_folder: str,
         no_clusters=False,
         clusters_origianl=False,
         clusters_mutex=False,
-        complete=True):
-    """Print List of Goals"""
+        complete=True,
+        workers: int = None,
+        goals_realizability: Dict[str, Tuple[bool, bool, float]] = None):
+    """Print List of Goals.
+    'workers' processes compose and synthesize the clusters in parallel (COGOMO_WORKERS by default).
+    'goals_realizability' maps the names of the goals to their (controller_generated, trivial, exec_time),
+    when it has already been computed, e.g. by a sweep over the subsets of goals.
+    The results of each stage are also streamed to RESULTS.jsonl in 'result_folder'"""
     for g in list_of_goals:
         print(g)
 
+    results = ResultsWriter(result_folder + "/" + RESULTS_FILE, complete=complete)
+
     controller_generated_and = False
     trivial_and = False
     controller_generated_or = False
@@ -139,13 +145,18 @@ def run(list_of_goals: List[CGTGoal], result_folder: str,
     goals_res = ""
     for g in list_of_goals:
         """Generate controller from goals as is, where the assumptions are in AND"""
-        controller, trivial, exec_time = create_general_controller_from_goals([g],
-                                                                              result_folder + "/goal_list/" + g.name + "/",
-                                                                              "AND")
+        if goals_realizability is not None and g.name in goals_realizability:
+            controller, trivial, exec_time = goals_realizability[g.name]
+        else:
+            controller, trivial, exec_time = create_general_controller_from_goals([g],
+                                                                                  result_folder + "/goal_list/" + g.name + "/",
+                                                                                  "AND")
         if controller:
             goals_res += g.name + "\t" + "YES\t" + format(exec_time, '.3f') + "sec\n"
         else:
             goals_res += g.name + "\t" + "NO\t" + format(exec_time, '.3f') + "sec\n"
+        results.write("goal", goal=g.name, realizable=controller, trivial=trivial, synthesis_time=exec_time,
+                      **goal_sizes(g))
 
 
     summary_file_name = result_folder + "/SUMMARY.txt"
@@ -164,6 +175,9 @@ def run(list_of_goals: List[CGTGoal], result_folder: str,
                                                                                                     result_folder + "/general_with_and/",
                                                                                                     "AND")
 
+        results.write("general", mode="AND", goals=[g.name for g in list_of_goals],
+                      realizable=controller_generated_and, trivial=trivial_and, synthesis_time=exec_time_and)
+
         ret = "\n\n~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~\n"
         ret += "GENERAL SPECIFICATION WITH ALL GAOLS: **AND** OF ASSUMPTIONS **AND** OF GUARANTEES\n"
         ret += "-->\t" + str(len(list_of_goals)) + " goals: " + str([c.name for c in list_of_goals]) + "\n"
@@ -185,6 +199,9 @@ def run(list_of_goals: List[CGTGoal], result_folder: str,
         controller_generated_or, trivial_or, exec_time_or = create_general_controller_from_goals(list_of_goals,
                                                                                                  result_folder + "/general_with_or/",
                                                                                                  "OR")
+        results.write("general", mode="OR", goals=[g.name for g in list_of_goals],
+                      realizable=controller_generated_or, trivial=trivial_or, synthesis_time=exec_time_or)
+
         ret = "\n\n~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~\n"
         ret += "GENERAL SPECIFICATION WITH ALL GAOLS: **OR** OF ASSUMPTIONS **AND** OF GUARANTEES\n"
         ret += "-->\t" + str(len(list_of_goals)) + " goals: " + str([c.name for c in list_of_goals]) + "\n"
@@ -203,6 +220,7 @@ def run(list_of_goals: List[CGTGoal], result_folder: str,
 
     if no_clusters:
         """No Clustering, Conjunction of all the goals (with saturated G = A->G)"""
+        start_time = time.time()
         try:
             cgt = conjunction(deepcopy(list_of_goals))
         except CGTFailException as e:
@@ -212,8 +230,12 @@ def run(list_of_goals: List[CGTGoal], result_folder: str,
         save_to_file(str(cgt.print_cgt_CROME()), result_folder + "/CGT_no_clusters/CGT_CROME.txt")
 
         """Generate a controller from cgt root"""
+        compose_time = time.time() - start_time
         realizable_no_clusters, no_clusters_exec_time = generate_controller_from_cgt(cgt,
                                                                                      result_folder + "/CGT_no_clusters/", complete)
+        results.write("no_clusters", goals=[g.name for g in list_of_goals], realizable=realizable_no_clusters,
+                      compose_time=compose_time, synthesis_time=no_clusters_exec_time,
+                      phases=phases_of(result_folder + "/CGT_no_clusters/specification.txt"), **goal_sizes(cgt))
 
         ret = "\n\n~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~\n"
         ret += "CGT WITH CONJUNCTION OF GOALS\n"
@@ -222,6 +244,7 @@ def run(list_of_goals: List[CGTGoal], result_folder: str,
             ret += "REALIZABLE\tYES\t\t" + format(no_clusters_exec_time, '.3f') + "sec\n"
         else:
             ret += "REALIZABLE\tNO\t\t" + format(no_clusters_exec_time, '.3f') + "sec\n"
+        ret += pretty_print_synthesis_phases(result_folder + "/CGT_no_clusters/specification.txt")
         ret += "~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~\n\n"
         f = open(summary_file_name, "a+")
         f.write(ret)
@@ -229,12 +252,17 @@ def run(list_of_goals: List[CGTGoal], result_folder: str,
 
     """Clustering"""
     """Create cgt with the goals, it will automatically compose/conjoin them based on the context"""
+    start_time = time.time()
     context_goals = create_contextual_clusters(list_of_goals, "MUTEX", rules["context"])
+    results.write("contexts", goals=[g.name for g in list_of_goals], contexts=len(context_goals),
+                  clustering_time=time.time() - start_time)
 
     if clusters_mutex:
         """Create the CGT composing the goals with the context"""
+        start_time = time.time()
         try:
-            cgt_1 = create_cgt(context_goals, compose_with_context=True)
+            timed_out_1 = []
+            cgt_1 = create_cgt(context_goals, compose_with_context=True, workers=workers, timed_out=timed_out_1)
         except CGTFailException as e:
             print(pretty_cgt_exception(e))
             sys.exit()
@@ -242,14 +270,19 @@ def run(list_of_goals: List[CGTGoal], result_folder: str,
         save_to_file(str(cgt_1.print_cgt_CROME()), result_folder + "/cgt_clusters_mutex/CGT_CROME.txt")
 
         """Generate a controller for each branch of the CGT"""
+        compose_time = time.time() - start_time
         realizables_clustered, exec_times_clustered = generate_controllers_from_cgt_clustered(cgt_1,
-                                                                                              result_folder + "/cgt_clusters_mutex/", complete)
+                                                                                              result_folder + "/cgt_clusters_mutex/", complete,
+                                                                                              workers)
+        write_clusters_results(results, "MUTEX", cgt_1, realizables_clustered, exec_times_clustered,
+                               result_folder + "/cgt_clusters_mutex/", compose_time, len(context_goals), timed_out_1)
 
         ret = "\n\n~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~\n"
         ret += "CGT WITH MUTEX CLUSTERS \t  " + str(sum(realizables_clustered)) + "/" + str(
             len(realizables_clustered)) + " REALIZABLE \n"
         cluster_goals = cgt_1.refined_by
         ret += "FEASIBLE CLUSTERS:\t " + str(len(cluster_goals)) + "/" + str(len(context_goals.keys()))
+        ret += pretty_print_timed_out_clusters(timed_out_1)
         for i, goal in enumerate(cluster_goals):
             ret += "\nCLUSTER " + str(i) + "\n"
             ret += "SCENARIO:\t" + str(goal.goal_context_to_show.formula) + "\n-->\t" + str(
@@ -260,6 +293,8 @@ def run(list_of_goals: List[CGTGoal], result_folder: str,
                     ret += "REALIZABLE\tMUTEX    \tYES\t\t" + format(exec_times_clustered[i], '.3f') + "sec\n"
                 else:
                     ret += "REALIZABLE\tMUTEX    \tNO\t\t" + format(exec_times_clustered[i], '.3f') + "sec\n"
+                ret += pretty_print_synthesis_phases(
+                    result_folder + "/cgt_clusters_mutex/cluster_" + str(i) + "/specification.txt")
         ret += "~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~\n\n"
 
         f = open(summary_file_name, "a+")
@@ -268,8 +303,10 @@ def run(list_of_goals: List[CGTGoal], result_folder: str,
 
     if clusters_origianl:
         """Create the CGT composing the goals without the context"""
+        start_time = time.time()
         try:
-            cgt_2 = create_cgt(context_goals, compose_with_context=False)
+            timed_out_2 = []
+            cgt_2 = create_cgt(context_goals, compose_with_context=False, workers=workers, timed_out=timed_out_2)
         except CGTFailException as e:
             print(pretty_cgt_exception(e))
             sys.exit()
@@ -277,8 +314,12 @@ def run(list_of_goals: List[CGTGoal], result_folder: str,
         save_to_file(str(cgt_2), result_folder + "/CGT_with_clusters/CGT.txt")
         save_to_file(str(cgt_2.print_cgt_CROME()), result_folder + "/CGT_with_clusters/CGT_CROME.txt")
 
+        compose_time = time.time() - start_time
         realizables_original, exec_times_original = generate_controllers_from_cgt_clustered(cgt_2,
-                                                                                            result_folder + "/CGT_with_clusters/", complete)
+                                                                                            result_folder + "/CGT_with_clusters/", complete,
+                                                                                            workers)
+        write_clusters_results(results, "ORIGINAL", cgt_2, realizables_original, exec_times_original,
+                               result_folder + "/CGT_with_clusters/", compose_time, len(context_goals), timed_out_2)
 
         unrealizable_goals = {}
 
@@ -287,6 +328,7 @@ def run(list_of_goals: List[CGTGoal], result_folder: str,
             len(realizables_original)) + " REALIZABLE\n"
         original_goals = cgt_2.refined_by
         ret += "FEASIBLE CLUSTERS:\t " + str(len(original_goals)) + "/" + str(len(context_goals.keys()))
+        ret += pretty_print_timed_out_clusters(timed_out_2)
         for i, goal in enumerate(original_goals):
             ret += "\nCLUSTER " + str(i) + "\n"
             ret += "SCENARIO:\t" + str(goal.goal_context_to_show.formula) + "\n-->\t" + str(
@@ -302,6 +344,8 @@ def run(list_of_goals: List[CGTGoal], result_folder: str,
                             unrealizable_goals[g_name] += 1
                         else:
                             unrealizable_goals[g_name] = 1
+                ret += pretty_print_synthesis_phases(
+                    result_folder + "/CGT_with_clusters/cluster_" + str(i) + "/specification.txt")
         ret += "~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~\n\n"
 
         ret += "\n~~~~~~~~~~'UNSAT-CORE' -  UNREALIZABLE GOALS~~~~~~~~~~~~~~~~\n"
@@ -332,6 +376,11 @@ def run(list_of_goals: List[CGTGoal], result_folder: str,
 
 
 if __name__ == "__main__":
+    try:
+        shutil.rmtree(results_path)
+    except:
+        pass
+
     realizable_no_clusters, realizables_clustered, realizables_original, no_clusters_exec_time, exec_times_clustered, exec_times_original = run(
         list_of_goals=goals,
         result_folder=results_path,
@@ -351,3 +400,7 @@ if __name__ == "__main__":
         clusters_origianl=True,
         clusters_mutex=False,
         complete=True)
+
+    """Where the time went: calls to nuXmv, strix and ltl2tgba by operation"""
+    print(profiler.report())
+    save_to_file(profiler.report(), results_path + "/PROFILE.txt")
@@ -1,25 +1,55 @@
-import itertools
 import os
 import shutil
 import sys
 
-from goals.operations import create_contextual_clusters, create_cgt, CGTFailException, pretty_cgt_exception, \
-    pretty_print_summary_clustering, conjunction
+from helper.profiling import profiler
+from helper.sweep import sweep
 from helper.tools import save_to_file
 
 from mission_specification import get_inputs
-from run_clustering import run
 
 results_path = os.path.dirname(os.path.abspath(__file__)) + "/output/results"
-try:
-    shutil.rmtree(results_path)
-except:
-    pass
+
+"""Run with --resume to keep the results of an interrupted sweep and run only the missing subsets"""
+resume = "--resume" in sys.argv or os.environ.get("COGOMO_SWEEP_RESUME", "0") == "1"
+
+if not resume:
+    try:
+        shutil.rmtree(results_path)
+    except:
+        pass
 
 sys.path.append(os.path.join(os.getcwd(), os.path.pardir))
 
 ap, rules, goals = get_inputs()
 
+
+def pretty_print_record(record: dict) -> str:
+    ret = ""
+    if len(goals) > 1:
+        ret += "COMBINATION " + str(record["size"]) + "-" + str(record["index"]) + "\n"
+        ret += "GOALS             :\t" + str(record["goals"]) + "\n"
+    else:
+        ret += "GOAL              :\t" + str(record["goals"]) + "\n"
+    if record.get("timeout"):
+        ret += "TIMEOUT\n\n\n"
+        return ret
+    if record["failed"]:
+        ret += "FAILED\n\n\n"
+        return ret
+    name = "RLSB_NO_CLUSTERS      " if len(goals) > 1 else "RLSB_GENERAL      "
+    if record["rnc"]:
+        ret += name + ":\tYES" + "\t\t" + format(record["t1"], '.3f') + "sec\n"
+    else:
+        ret += name + ":\tNO" + "\t\t" + format(record["t1"], '.3f') + "sec\n"
+    ret += "RLSB_CLUSTERS_1   :\t" + str(sum(record["rcc"])) + " / " + str(len(record["rcc"])) + "\t\t" + \
+           format(sum(record["t2"]), '.3f') + "sec\n"
+    ret += "RLSB_CLUSTERS_2   :\t" + str(sum(record["rco"])) + " / " + str(len(record["rco"])) + "\t\t" + \
+           format(sum(record["t3"]), '.3f') + "sec\n"
+    ret += "\n\n"
+    return ret
+
+
 if __name__ == "__main__":
 
     """Print List of Goals"""
@@ -28,51 +58,18 @@ if __name__ == "__main__":
 
     print("Generating all combinations of goals")
 
+    records = sweep(goals, results_path, resume=resume)
+
+    """The summary is written from the records, in the order of the combinations"""
     summary_file_name = results_path + "/SUMMARY_COMBINATIONS.txt"
     dirname = os.path.dirname(summary_file_name)
     if not os.path.exists(dirname):
         os.makedirs(dirname)
     with open(summary_file_name, 'w') as f:
         f.write("SUMMARY OF COMBINATIONS \n\n")
+        for record in records:
+            f.write(pretty_print_record(record))
 
-    f.close()
-
-    if len(goals) > 1:
-        for i in range(1, len(goals)):
-            for j, subset in enumerate(itertools.combinations(goals, i)):
-                rnc, rcc, rco, t1, t2, t3 = run(list(subset),
-                                                results_path + "/comb_" + str(i) + "_" + str(j),
-                                                no_clusters=True,
-                                                clusters_origianl=True,
-                                                clusters_mutex=True)
-                f = open(summary_file_name, "a+")
-                f.write("COMBINATION " + str(i) + "-" + str(j) + "\n")
-                f.write("GOALS             :\t" + str([g.name for g in subset]) + "\n")
-                if rnc:
-                    f.write("RLSB_NO_CLUSTERS      :\tYES" + "\t\t" + format(t1, '.3f') + "sec\n")
-                else:
-                    f.write("RLSB_NO_CLUSTERS      :\tNO" + "\t\t" + format(t1, '.3f') + "sec\n")
-                f.write("RLSB_CLUSTERS_1   :\t" + str(sum(rcc)) + " / " + str(len(rcc)) + "\t\t" + format(sum(t2),
-                                                                                                          '.3f') + "sec\n")
-                f.write("RLSB_CLUSTERS_2   :\t" + str(sum(rco)) + " / " + str(len(rco)) + "\t\t" + format(sum(t3),
-                                                                                                          '.3f') + "sec\n")
-                f.write("\n\n")
-                f.close()
-    else:
-        rnc, rcc, rco, t1, t2, t3 = run(goals,
-                                        "comb_1",
-                                        no_clusters=True,
-                                        clusters_origianl=True,
-                                        clusters_mutex=True)
-        f = open(summary_file_name, "a+")
-        f.write("GOAL              :\t" + str([g.name for g in goals]) + "\n")
-        if rnc:
-            f.write("RLSB_GENERAL      :\tYES" + "\t\t" + format(t1, '.3f') + "sec\n")
-        else:
-            f.write("RLSB_GENERAL      :\tNO" + "\t\t" + format(t1, '.3f') + "sec\n")
-        f.write(
-            "RLSB_CLUSTERS_1   :\t" + str(sum(rcc)) + " / " + str(len(rcc)) + "\t\t" + format(sum(t2), '.3f') + "sec\n")
-        f.write(
-            "RLSB_CLUSTERS_2   :\t" + str(sum(rco)) + " / " + str(len(rco)) + "\t\t" + format(sum(t3), '.3f') + "sec\n")
-        f.write("\n\n")
-        f.close()
+    """Where the time went: calls to nuXmv, strix and ltl2tgba by operation"""
+    print(profiler.report())
+    save_to_file(profiler.report(), results_path + "/PROFILE.txt")
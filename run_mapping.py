@@ -2,10 +2,12 @@ import sys
 import os
 import shutil
 
+from checks.cache import cache_folder
 from components.components import ComponentsLibrary, Component, SimpleComponent
 from goals.operations import create_contextual_clusters, mapping, pretty_print_summary_clustering, create_cgt, \
     CGTFailException, \
     pretty_cgt_exception
+from helper.profiling import profiler
 from helper.tools import save_to_file
 from src.goals.cgtgoal import *
 from src.typescogomo.assumption import *
@@ -153,12 +155,18 @@ if __name__ == "__main__":
         ]
     )
 
+    """Relations between the components computed in the previous runs, if the components have not changed"""
+    library_snapshot = os.path.join(cache_folder, "library_" + component_library.name + ".pickle")
+    component_library.restore(library_snapshot)
+
     """Looking in the library for components for goals that can refine all the goals to pickup an object 'a->pickup'"""
     goals_to_map = cgt.get_all_goals_with_name("a->pickup")
 
     for goal in goals_to_map:
         mapping(component_library, goal)
 
+    component_library.save(library_snapshot)
+
     save_to_file(str(cgt), file_path + "/cgt_4_mapping")
 
     """Refinements formalize a notion of substitutability. We can substitute goals with most refined one.
@@ -175,3 +183,7 @@ if __name__ == "__main__":
     cgt.abstract_guarantees_of("collaborate||pick_up_item||robot_2||robot_3",
                                guarantees, "pick_up_item_abstracted")
     save_to_file(str(cgt), file_path + "/cgt_6_abstracted")
+
+    """Where the time went: calls to nuXmv, strix and ltl2tgba by operation"""
+    print(profiler.report())
+    save_to_file(profiler.report(), file_path + "/PROFILE.txt")
@@ -0,0 +1,247 @@
+import threading
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from checks.syntax import Node, parse, atom_set, conjuncts, LTLSyntaxError
+
+"""Reduced ordered BDDs of the propositional formulas over boolean variables.
+They decide in-process the queries on the contexts, which are conjunctions of a propositional formula on the
+initial state and of invariants G(propositional formula), see 'check_state_invariant'"""
+
+"""Decide the queries on state formulas and invariants with BDDs instead of calling nuXmv"""
+USE_BDD_FAST_PATH = True
+
+
+class NotPropositional(Exception):
+    pass
+
+
+class BDD:
+    """Manager of the BDD nodes. A node is an integer, equivalent formulas have the same node.
+    The variables are ordered by first use"""
+
+    FALSE = 0
+    TRUE = 1
+
+    def __init__(self, max_cache_size: int = 1000000):
+        self.max_cache_size = max_cache_size
+
+        self.__lock = threading.RLock()
+
+        self.__levels: Dict[str, int] = {}
+
+        """(level, low, high) of each node, the terminals have the lowest level"""
+        terminal_level = float("inf")
+        self.__nodes: List[Tuple[float, int, int]] = [(terminal_level, 0, 0), (terminal_level, 1, 1)]
+        self.__unique: Dict[Tuple[int, int, int], int] = {}
+        self.__ite_cache: Dict[Tuple[int, int, int], int] = {}
+
+    def __len__(self):
+        return len(self.__nodes)
+
+    def var(self, name: str) -> int:
+        with self.__lock:
+            if name not in self.__levels:
+                self.__levels[name] = len(self.__levels)
+            return self.__mk(self.__levels[name], BDD.FALSE, BDD.TRUE)
+
+    def __mk(self, level: int, low: int, high: int) -> int:
+        if low == high:
+            return low
+        key = (level, low, high)
+        node = self.__unique.get(key)
+        if node is None:
+            node = len(self.__nodes)
+            self.__nodes.append(key)
+            self.__unique[key] = node
+        return node
+
+    def ite(self, f: int, g: int, h: int) -> int:
+        """If f then g else h"""
+        with self.__lock:
+            if len(self.__ite_cache) > self.max_cache_size:
+                self.__ite_cache.clear()
+            return self.__ite(f, g, h)
+
+    def __ite(self, f: int, g: int, h: int) -> int:
+        if f == BDD.TRUE:
+            return g
+        if f == BDD.FALSE:
+            return h
+        if g == h:
+            return g
+        if g == BDD.TRUE and h == BDD.FALSE:
+            return f
+
+        key = (f, g, h)
+        result = self.__ite_cache.get(key)
+        if result is not None:
+            return result
+
+        level = min(self.__nodes[f][0], self.__nodes[g][0], self.__nodes[h][0])
+        f_low, f_high = self.__cofactors(f, level)
+        g_low, g_high = self.__cofactors(g, level)
+        h_low, h_high = self.__cofactors(h, level)
+        low = self.__ite(f_low, g_low, h_low)
+        high = self.__ite(f_high, g_high, h_high)
+        result = self.__mk(level, low, high)
+
+        self.__ite_cache[key] = result
+        return result
+
+    def __cofactors(self, f: int, level: int) -> Tuple[int, int]:
+        f_level, f_low, f_high = self.__nodes[f]
+        if f_level == level:
+            return f_low, f_high
+        return f, f
+
+    def negate(self, f: int) -> int:
+        return self.ite(f, BDD.FALSE, BDD.TRUE)
+
+    def conjoin(self, f: int, g: int) -> int:
+        return self.ite(f, g, BDD.FALSE)
+
+    def disjoin(self, f: int, g: int) -> int:
+        return self.ite(f, BDD.TRUE, g)
+
+    def implies(self, f: int, g: int) -> bool:
+        """True if f -> g is valid"""
+        return self.ite(f, g, BDD.TRUE) == BDD.TRUE
+
+
+"""Shared manager, the nodes of different managers cannot be combined"""
+bdd = BDD()
+
+
+@lru_cache(maxsize=100000)
+def _to_bdd(tree: Node) -> int:
+    operator = tree.op
+    if operator == "TRUE":
+        return BDD.TRUE
+    if operator == "FALSE":
+        return BDD.FALSE
+    if operator == "atom":
+        return bdd.var(tree.args[0])
+
+    if operator == "!":
+        return bdd.negate(_to_bdd(tree.args[0]))
+    if operator == "&":
+        result = BDD.TRUE
+        for arg in tree.args:
+            result = bdd.conjoin(result, _to_bdd(arg))
+        return result
+    if operator == "|":
+        result = BDD.FALSE
+        for arg in tree.args:
+            result = bdd.disjoin(result, _to_bdd(arg))
+        return result
+    if operator == "->":
+        return bdd.ite(_to_bdd(tree.args[0]), _to_bdd(tree.args[1]), BDD.TRUE)
+    if operator == "<->" or operator == "xnor":
+        b = _to_bdd(tree.args[1])
+        return bdd.ite(_to_bdd(tree.args[0]), b, bdd.negate(b))
+    if operator == "xor":
+        b = _to_bdd(tree.args[1])
+        return bdd.ite(_to_bdd(tree.args[0]), bdd.negate(b), b)
+
+    """Temporal operators and integer expressions"""
+    raise NotPropositional(operator)
+
+
+def to_bdd(tree: Node) -> Optional[int]:
+    """BDD of a propositional formula over boolean variables, None for any other formula"""
+    try:
+        return _to_bdd(tree)
+    except NotPropositional:
+        return None
+
+
+@lru_cache(maxsize=100000)
+def state_invariant(tree: Node) -> Optional[Tuple[int, int]]:
+    """Decomposes a conjunction of propositional formulas and of invariants G(propositional formula)
+    as the pair of BDDs (state, invariant), None if the formula has another shape"""
+    state = BDD.TRUE
+    invariant = BDD.TRUE
+    for conjunct in conjuncts(tree):
+        if conjunct.op == "G":
+            body = to_bdd(conjunct.args[0])
+            if body is None:
+                return None
+            invariant = bdd.conjoin(invariant, body)
+        else:
+            formula = to_bdd(conjunct)
+            if formula is None:
+                return None
+            state = bdd.conjoin(state, formula)
+    return state, invariant
+
+
+def is_satisfiable(form: Tuple[int, int]) -> bool:
+    """'state & G(invariant)' is satisfiable iff 'state & invariant' is: the trace can stay in its initial state"""
+    state, invariant = form
+    return bdd.conjoin(state, invariant) != BDD.FALSE
+
+
+def includes(form_a: Tuple[int, int], form_b: Tuple[int, int]) -> bool:
+    """True if 'state_a & G(invariant_a) -> state_b & G(invariant_b)' is valid.
+    The initial state satisfies 'state_a & invariant_a' and any other state satisfies 'invariant_a'"""
+    state_a, invariant_a = form_a
+    state_b, invariant_b = form_b
+    initial_a = bdd.conjoin(state_a, invariant_a)
+    if initial_a == BDD.FALSE:
+        return True
+    return bdd.implies(initial_a, state_b) and bdd.implies(invariant_a, invariant_b)
+
+
+def canonical_form(tree: Node) -> Optional[Tuple[int, int]]:
+    """Equivalent formulas of the shape 'state & G(invariant)' have the same canonical form"""
+    form = state_invariant(tree)
+    if form is None:
+        return None
+    if not is_satisfiable(form):
+        return BDD.FALSE, BDD.FALSE
+    state, invariant = form
+    return bdd.conjoin(state, invariant), invariant
+
+
+def check_state_invariant(variables: List[str], ltlspec: str) -> Optional[bool]:
+    """Returns True if 'ltlspec' holds when it is a query on formulas of the shape 'state & G(invariant)',
+    None if it must be checked by nuXmv. The queries are:
+        !(f)        f is not satisfiable
+        (f -> g)    f is included in g
+        f           f is valid"""
+    if not USE_BDD_FAST_PATH:
+        return None
+
+    try:
+        tree = parse(ltlspec)
+    except LTLSyntaxError:
+        return None
+
+    """All the variables must be declared as boolean, otherwise nuXmv reports the error"""
+    booleans = set()
+    for declaration in variables:
+        name, _, basic_type = declaration.replace(";", "").partition(":")
+        if basic_type.strip() == "boolean":
+            booleans.add(name.strip())
+    if not atom_set(tree) <= booleans:
+        return None
+
+    if tree.op == "!":
+        form = state_invariant(tree.args[0])
+        if form is not None:
+            return not is_satisfiable(form)
+        return None
+
+    if tree.op == "->":
+        form_a = state_invariant(tree.args[0])
+        form_b = state_invariant(tree.args[1])
+        if form_a is not None and form_b is not None:
+            return includes(form_a, form_b)
+        return None
+
+    form = state_invariant(tree)
+    if form is not None:
+        state, invariant = form
+        return state == BDD.TRUE and invariant == BDD.TRUE
+    return None
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import List, Any
+
+cache_folder = os.environ.get("COGOMO_CACHE",
+                              os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'output', 'cache')))
+
+"""Set COGOMO_CACHE_DISK=0 to keep the results only in memory"""
+USE_DISK_CACHE = os.environ.get("COGOMO_CACHE_DISK", "1") != "0"
+
+
+def canonical_key(variables: List[str], formula: str) -> str:
+    """Content address of a query: the set of variable declarations and the formula, whitespace-normalized"""
+    declarations = sorted(set(" ".join(v.replace(";", "").split()) for v in variables))
+    formula = " ".join(formula.split())
+    text = "\n".join(declarations) + "\n" + formula
+    return hashlib.sha256(text.encode("UTF-8")).hexdigest()
+
+
+class ResultCache:
+    """Two-tier cache of the results of the checks.
+    The first tier is an in-memory LRU dictionary, the second tier is a sqlite database on disk
+    that survives across runs. Values must be JSON serializable"""
+
+    def __init__(self, name: str, max_size: int = 100000, folder: str = None, persistent: bool = None):
+        self.name = name
+        self.max_size = max_size
+
+        if folder is None:
+            folder = cache_folder
+        if persistent is None:
+            persistent = USE_DISK_CACHE
+
+        self.__memory: OrderedDict = OrderedDict()
+        self.__lock = threading.RLock()
+
+        self.__db_path = os.path.join(folder, name + ".sqlite") if persistent else None
+        self.__db = None
+        self.__db_pid = None
+
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def db_path(self) -> str:
+        return self.__db_path
+
+    def __connection(self):
+        """Lazily open the database, a new connection is opened in child processes"""
+        if self.__db_path is None:
+            return None
+        if self.__db is None or self.__db_pid != os.getpid():
+            dirname = os.path.dirname(self.__db_path)
+            if not os.path.exists(dirname):
+                os.makedirs(dirname, exist_ok=True)
+            self.__db = sqlite3.connect(self.__db_path, timeout=60, check_same_thread=False)
+            self.__db.execute("PRAGMA journal_mode=WAL")
+            self.__db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT)")
+            self.__db.commit()
+            self.__db_pid = os.getpid()
+        return self.__db
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self.__lock:
+            if key in self.__memory:
+                self.__memory.move_to_end(key)
+                self.hits += 1
+                return self.__memory[key]
+
+            db = self.__connection()
+            if db is not None:
+                row = db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    value = json.loads(row[0])
+                    self.__remember(key, value)
+                    self.hits += 1
+                    return value
+
+            self.misses += 1
+            return default
+
+    def put(self, key: str, value: Any):
+        with self.__lock:
+            self.__remember(key, value)
+            db = self.__connection()
+            if db is not None:
+                db.execute("INSERT OR REPLACE INTO results (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+                db.commit()
+
+    def __remember(self, key: str, value: Any):
+        self.__memory[key] = value
+        self.__memory.move_to_end(key)
+        if len(self.__memory) > self.max_size:
+            self.__memory.popitem(last=False)
+
+    def __len__(self):
+        return len(self.__memory)
+
+    def clear(self, disk: bool = False):
+        """Empty the in-memory tier and optionally the on-disk tier"""
+        with self.__lock:
+            self.__memory.clear()
+            if disk:
+                db = self.__connection()
+                if db is not None:
+                    db.execute("DELETE FROM results")
+                    db.commit()
+
+    def __getstate__(self):
+        """Connections and locks are not shared with other processes"""
+        state = self.__dict__.copy()
+        state["_ResultCache__db"] = None
+        state["_ResultCache__db_pid"] = None
+        state["_ResultCache__lock"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__lock = threading.RLock()
@@ -1,8 +1,33 @@
+import os
 import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Tuple, List, Union
+from checks.bdd import check_state_invariant
+from checks.cache import ResultCache, canonical_key
+from checks.pool import nuxmv_pool, NuXmvTimeout, NUXMV_TIMEOUT
+from checks.propositional import check_propositional
+from checks.simplify import simplify_formula
+from checks.syntax import formula_size
 from checks.tools import And, Not
+from helper.logger import get_logger
+from helper.profiling import profiler
 
-smvfile = "nusmvfile.smv"
+"""Kinds of queries accepted by check_many"""
+SATISFIABILITY = "satisfiability"
+VALIDITY = "validity"
+
+"""Number of checks run concurrently by check_many, set NUXMV_WORKERS to change it"""
+N_WORKERS = int(os.environ["NUXMV_WORKERS"]) if "NUXMV_WORKERS" in os.environ else (os.cpu_count() or 1)
+
+"""Stream the checks to the pool of interactive nuXmv processes instead of starting one process per check"""
+USE_INTERACTIVE = True
+
+"""Results of the LTLSPEC checks, shared across runs"""
+nusmv_cache = ResultCache("nusmv")
+
+logger = get_logger(__name__)
 
 
 def check_satisfiability(variables: List[str],
@@ -15,68 +40,136 @@ def check_satisfiability(variables: List[str],
     if len(propositions) == 0:
         return True
 
-    """Write the NuSMV file"""
-    with open(smvfile, 'w') as ofile:
-
-        ofile.write('MODULE main\n')
-
-        ofile.write('VAR\n')
-
-        for v in list(set(variables)):
-            ofile.write('\t' + v + ";\n")
-
-        ofile.write('\n')
-        ofile.write('LTLSPEC ')
-        ofile.write(str(Not(And(propositions))))
-
-        ofile.write('\n')
-
-    try:
-        output = subprocess.check_output(['nuXmv', smvfile], encoding='UTF-8', stderr=subprocess.DEVNULL).splitlines()
-        output = [x for x in output if not (x[:3] == '***' or x[:7] == 'WARNING' or x == '')]
-        for line in output:
-            if line[:16] == '-- specification':
-                if 'is false' in line:
-                    print("\t\t\tSAT:\t" + str(And(propositions)))
-                    return True
-                elif 'is true' in line:
-                    return False
-
-    except Exception as e:
-        with open(smvfile, 'r') as fin:
-            print(fin.read())
-        raise e
+    """The propositions are satisfiable if their negation is not valid"""
+    conjunction = And(propositions)
+    satisfiable = not check_ltlspec(variables, Not(conjunction))
+    if satisfiable:
+        logger.debug("\t\t\tSAT:\t%s", conjunction)
+    return satisfiable
 
 
 def check_validity(variables: List[str],
                    proposition: str) -> bool:
-    proposition = proposition
 
-    """Write the NuSMV file"""
-    with open(smvfile, 'w') as ofile:
-
-        ofile.write('MODULE main\n')
-
-        ofile.write('VAR\n')
-
-        for v in list(set(variables)):
-            ofile.write('\t' + v + ";\n")
-
-        ofile.write('\n')
-        ofile.write('LTLSPEC ' + proposition)
+    valid = check_ltlspec(variables, proposition)
+    if valid:
+        logger.debug("\t\t\tVALID:\t%s", proposition)
+    return valid
+
+
+def check_query(query: Tuple[str, List[str], Union[List[str], str]]) -> bool:
+    """query: (kind, variables, formula), where kind is SATISFIABILITY or VALIDITY"""
+    kind, variables, formula = query
+    if kind == SATISFIABILITY:
+        return check_satisfiability(variables, formula)
+    elif kind == VALIDITY:
+        return check_validity(variables, formula)
+    else:
+        raise Exception("Unknown kind of query: " + kind)
+
+
+def check_many(queries: List[Tuple[str, List[str], Union[List[str], str]]], workers: int = None) -> List[bool]:
+    """Run independent queries concurrently and return their results in the same order.
+    The checks are executed by nuXmv processes, the threads only feed them"""
+    if workers is None:
+        workers = N_WORKERS
+    if len(queries) <= 1 or workers <= 1:
+        return [check_query(q) for q in queries]
+    with ThreadPoolExecutor(max_workers=min(workers, len(queries))) as executor:
+        return list(executor.map(profiler.in_current_operation(check_query), queries))
+
+
+def check_ltlspec(variables: List[str], ltlspec: str) -> bool:
+    """Returns True if 'ltlspec' holds. The formula is simplified, the queries on propositional formulas and
+    invariants are decided in-process, the others are looked up in the cache before calling nuXmv.
+    The profiler records the one that decided the query"""
+    ltlspec = simplify_formula(ltlspec)
+    if ltlspec == "TRUE" or ltlspec == "FALSE":
+        profiler.record("simplify", size=1)
+        return ltlspec == "TRUE"
+
+    ltlspec_size = formula_size(ltlspec)
+
+    start_time = time.time()
+    result = check_state_invariant(variables, ltlspec)
+    if result is not None:
+        profiler.record("bdd", time.time() - start_time, ltlspec_size)
+        return result
+
+    start_time = time.time()
+    result = check_propositional(variables, ltlspec)
+    if result is not None:
+        profiler.record("z3", time.time() - start_time, ltlspec_size)
+        return result
+
+    key = canonical_key(variables, ltlspec)
+
+    result = nusmv_cache.get(key)
+    if result is not None:
+        profiler.record("nuxmv_cache", size=ltlspec_size)
+        return result
+
+    with profiler.timed("nuxmv", ltlspec_size):
+        result = run_nuxmv(variables, ltlspec)
+    nusmv_cache.put(key, result)
+    return result
+
+
+def smv_model(variables: List[str], ltlspec: str) -> str:
+    """Returns the NuSMV model declaring 'variables' and checking 'ltlspec'"""
+    model = 'MODULE main\n'
+    model += 'VAR\n'
+    for v in list(set(variables)):
+        model += '\t' + v + ";\n"
+    model += '\n'
+    model += 'LTLSPEC ' + ltlspec + '\n'
+    return model
+
+
+def run_nuxmv(variables: List[str], ltlspec: str) -> bool:
+    """Run nuXmv on the model, using a warm worker if possible"""
+    global USE_INTERACTIVE
+
+    model = smv_model(variables, ltlspec)
+
+    if USE_INTERACTIVE:
+        try:
+            return nuxmv_pool.check(model)
+        except NuXmvTimeout as e:
+            """A new process would time out as well"""
+            raise e
+        except OSError as e:
+            logger.warning("Interactive nuXmv not available (%s), starting one process per check", e)
+            USE_INTERACTIVE = False
+        except Exception as e:
+            """Re-run the check in a new process, which also reports the model on errors"""
+            logger.warning("Interactive nuXmv failed (%s)", e)
+
+    return run_nuxmv_process(model)
+
+
+def run_nuxmv_process(model: str) -> bool:
+    """Write the model to a new temporary NuSMV file and run a new nuXmv process on it"""
+    fd, smvfile = tempfile.mkstemp(prefix="cogomo_", suffix=".smv")
+    with os.fdopen(fd, 'w') as ofile:
+        ofile.write(model)
 
     try:
-        output = subprocess.check_output(['nuXmv', smvfile], encoding='UTF-8', stderr=subprocess.DEVNULL).splitlines()
+        output = subprocess.check_output(['nuXmv', smvfile], encoding='UTF-8', stderr=subprocess.DEVNULL,
+                                         timeout=NUXMV_TIMEOUT).splitlines()
         output = [x for x in output if not (x[:3] == '***' or x[:7] == 'WARNING' or x == '')]
         for line in output:
             if line[:16] == '-- specification':
                 if 'is false' in line:
                     return False
                 elif 'is true' in line:
-                    print("\t\t\tVALID:\t" + proposition)
                     return True
 
     except Exception as e:
-        with open(smvfile, 'r') as fin:
-            print(fin.read())
+        logger.error("%s", model)
         raise e
+
+    finally:
+        os.remove(smvfile)
+
+    raise Exception("Unknown nuXmv response for model:\n" + model)
@@ -0,0 +1,199 @@
+import atexit
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+
+SENTINEL = "__COGOMO_CHECK_DONE__"
+
+"""Seconds a worker can take to answer a check before it is killed, set NUXMV_TIMEOUT to change it"""
+NUXMV_TIMEOUT = float(os.environ["NUXMV_TIMEOUT"]) if "NUXMV_TIMEOUT" in os.environ else 600.0
+
+
+class NuXmvTimeout(Exception):
+    pass
+
+
+class NuXmvWorker:
+    """Long-lived nuXmv process driven through its interactive shell.
+    Each worker owns a model file in a private temporary folder.
+    The output is read by a thread, so that the checks can time out"""
+
+    def __init__(self):
+        self.__folder = tempfile.mkdtemp(prefix="cogomo_nuxmv_")
+        self.__smvfile = os.path.join(self.__folder, "model.smv")
+        try:
+            self.__process = subprocess.Popen(['nuXmv', '-int'],
+                                              stdin=subprocess.PIPE,
+                                              stdout=subprocess.PIPE,
+                                              stderr=subprocess.DEVNULL,
+                                              encoding='UTF-8',
+                                              bufsize=1)
+        except Exception as e:
+            shutil.rmtree(self.__folder, ignore_errors=True)
+            raise e
+
+        """Lines of the output, "" at the end of the output"""
+        self.__lines: queue.Queue = queue.Queue()
+        self.__reader = threading.Thread(target=self.__read, daemon=True)
+        self.__reader.start()
+
+    def __read(self):
+        for line in self.__process.stdout:
+            self.__lines.put(line)
+        self.__lines.put("")
+
+    @property
+    def smvfile(self) -> str:
+        return self.__smvfile
+
+    def is_alive(self) -> bool:
+        return self.__process.poll() is None
+
+    def check(self, model: str, timeout: float = None) -> bool:
+        """Returns True if the LTLSPEC of 'model' holds.
+        Raises NuXmvTimeout if nuXmv does not answer within 'timeout' seconds"""
+        if timeout is None:
+            timeout = NUXMV_TIMEOUT
+
+        with open(self.__smvfile, 'w') as ofile:
+            ofile.write(model)
+
+        commands = ["reset",
+                    "read_model -i " + self.__smvfile,
+                    "go",
+                    "check_ltlspec",
+                    "echo " + SENTINEL]
+        self.__process.stdin.write("\n".join(commands) + "\n")
+        self.__process.stdin.flush()
+
+        result = None
+        while True:
+            try:
+                line = self.__lines.get(timeout=timeout)
+            except queue.Empty:
+                raise NuXmvTimeout("nuXmv did not answer in " + str(timeout) + " sec for model:\n" + model)
+            if line == "":
+                raise Exception("nuXmv interactive process terminated unexpectedly")
+            if SENTINEL in line:
+                break
+            if '-- specification' in line:
+                if 'is false' in line:
+                    result = False
+                elif 'is true' in line:
+                    result = True
+
+        if result is None:
+            raise Exception("Unknown nuXmv response for model:\n" + model)
+        return result
+
+    def close(self, kill: bool = False):
+        """Quits nuXmv, or kills it if 'kill' or if it does not quit"""
+        try:
+            if kill:
+                self.__process.kill()
+            elif self.is_alive():
+                self.__process.stdin.write("quit\n")
+                self.__process.stdin.flush()
+            self.__process.wait(timeout=5)
+        except Exception:
+            self.__process.kill()
+        shutil.rmtree(self.__folder, ignore_errors=True)
+
+
+class NuXmvPool:
+    """Pool of warm nuXmv workers. Requests wait for an idle worker,
+    new workers are started on demand up to 'size'. A worker that fails or times out is killed and its slot is
+    freed, so that a new worker is started by the next request"""
+
+    def __init__(self, size: int = None, timeout: float = None):
+        if size is None:
+            size = os.cpu_count() or 1
+        self.size = size
+        self.timeout = timeout
+
+        self.__idle = []
+        self.__workers = []
+
+        """Number of workers being started, they count towards 'size'"""
+        self.__starting = 0
+
+        self.__condition = threading.Condition()
+        self.__pid = os.getpid()
+
+    def __acquire(self) -> NuXmvWorker:
+        with self.__condition:
+            while True:
+                if len(self.__idle) > 0:
+                    return self.__idle.pop()
+                if len(self.__workers) + self.__starting < self.size:
+                    self.__starting += 1
+                    break
+                self.__condition.wait()
+
+        """A slot is reserved, the worker is started outside of the lock"""
+        try:
+            worker = NuXmvWorker()
+        except BaseException as e:
+            with self.__condition:
+                self.__starting -= 1
+                self.__condition.notify()
+            raise e
+        with self.__condition:
+            self.__starting -= 1
+            self.__workers.append(worker)
+        return worker
+
+    def __release(self, worker: NuXmvWorker):
+        if not worker.is_alive():
+            self.__discard(worker)
+            return
+        with self.__condition:
+            self.__idle.append(worker)
+            self.__condition.notify()
+
+    def __discard(self, worker: NuXmvWorker):
+        with self.__condition:
+            if worker in self.__workers:
+                self.__workers.remove(worker)
+            self.__condition.notify()
+        worker.close(kill=True)
+
+    def check(self, model: str) -> bool:
+        """Stream the model to a warm worker and return True if its LTLSPEC holds"""
+        if self.__pid != os.getpid():
+            """Workers cannot be shared with forked processes"""
+            self.__reset()
+
+        worker = self.__acquire()
+        try:
+            result = worker.check(model, self.timeout)
+        except BaseException as e:
+            self.__discard(worker)
+            raise e
+        self.__release(worker)
+        return result
+
+    def __reset(self):
+        self.__idle = []
+        self.__workers = []
+        self.__starting = 0
+        self.__condition = threading.Condition()
+        self.__pid = os.getpid()
+
+    def close(self):
+        with self.__condition:
+            workers = list(self.__workers)
+            self.__workers = []
+            self.__idle = []
+            self.__condition.notify_all()
+        for worker in workers:
+            worker.close()
+
+
+"""Shared pool of nuXmv workers, set NUXMV_WORKERS to change its size"""
+nuxmv_pool = NuXmvPool(int(os.environ["NUXMV_WORKERS"]) if "NUXMV_WORKERS" in os.environ else None)
+
+atexit.register(nuxmv_pool.close)
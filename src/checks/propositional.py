@@ -0,0 +1,130 @@
+import threading
+from typing import List, Optional, Tuple, Dict
+
+from checks.syntax import parse, is_temporal, LTLSyntaxError, Node
+
+try:
+    import z3
+
+    if not hasattr(z3, "Solver"):
+        """Only the z3 folder of this repository is on the path"""
+        z3 = None
+except ImportError:
+    z3 = None
+
+"""Decide the propositional queries in-process with z3 instead of calling nuXmv"""
+USE_PROPOSITIONAL_FAST_PATH = z3 is not None
+
+
+"""The z3 context is not thread-safe and check_many runs the checks in threads"""
+_z3_lock = threading.Lock()
+
+
+class NotSupported(Exception):
+    pass
+
+
+def _declare(variables: List[str]) -> Optional[Tuple[Dict, List]]:
+    """Returns the z3 variables and the constraints on their domains from the NuSMV declarations,
+    None if some type is not supported"""
+    symbols = {}
+    domains = []
+    for declaration in set(variables):
+        name, basic_type = [s.strip() for s in declaration.replace(";", "").split(":", 1)]
+        if basic_type == "boolean":
+            symbols[name] = z3.Bool(name)
+        elif ".." in basic_type:
+            low, high = [int(b) for b in basic_type.split("..")]
+            symbols[name] = z3.Int(name)
+            domains.append(z3.And(symbols[name] >= low, symbols[name] <= high))
+        else:
+            return None
+    return symbols, domains
+
+
+def _to_z3(tree: Node, symbols: Dict):
+    operator = tree.op
+    if operator == "TRUE":
+        return z3.BoolVal(True)
+    if operator == "FALSE":
+        return z3.BoolVal(False)
+    if operator == "atom":
+        return symbols[tree.args[0]]
+    if operator == "int":
+        return z3.IntVal(tree.args[0])
+
+    args = [_to_z3(arg, symbols) for arg in tree.args]
+
+    if operator == "!":
+        return z3.Not(args[0])
+    if operator == "&":
+        return z3.And(*args)
+    if operator == "|":
+        return z3.Or(*args)
+    if operator == "->":
+        return z3.Implies(args[0], args[1])
+    if operator == "<->" or operator == "xnor":
+        return args[0] == args[1]
+    if operator == "xor":
+        return z3.Xor(args[0], args[1])
+    if operator == "=":
+        return args[0] == args[1]
+    if operator == "!=":
+        return args[0] != args[1]
+    if operator == "<":
+        return args[0] < args[1]
+    if operator == ">":
+        return args[0] > args[1]
+    if operator == "<=":
+        return args[0] <= args[1]
+    if operator == ">=":
+        return args[0] >= args[1]
+    if operator == "+":
+        return args[0] + args[1]
+    if operator == "-":
+        return args[0] - args[1]
+    if operator == "*":
+        return args[0] * args[1]
+
+    """Integer division and modulo of nuXmv round differently from z3"""
+    raise NotSupported(operator)
+
+
+def check_propositional(variables: List[str], ltlspec: str) -> Optional[bool]:
+    """Returns True if 'ltlspec' holds when it is purely propositional, None if it must be checked by nuXmv.
+    Without temporal operators an LTLSPEC only constrains the initial state, so it holds iff it is valid"""
+    if not USE_PROPOSITIONAL_FAST_PATH:
+        return None
+
+    try:
+        tree = parse(ltlspec)
+    except LTLSyntaxError:
+        return None
+
+    if is_temporal(tree):
+        return None
+
+    with _z3_lock:
+        try:
+            declared = _declare(variables)
+        except ValueError:
+            return None
+        if declared is None:
+            return None
+        symbols, domains = declared
+
+        try:
+            formula = _to_z3(tree, symbols)
+            solver = z3.Solver()
+            solver.add(*domains)
+            solver.add(z3.Not(formula))
+            result = solver.check()
+        except (KeyError, NotSupported, z3.Z3Exception):
+            """Undeclared variables or type errors are reported by nuXmv"""
+            return None
+
+    if result == z3.unsat:
+        return True
+    if result == z3.sat:
+        return False
+    return None
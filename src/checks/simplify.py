@@ -0,0 +1,135 @@
+from functools import lru_cache
+
+from checks.syntax import Node, Operator, parse, LTLSyntaxError, TRUE, FALSE
+
+"""Syntactic rewriting of the formulas before they are given to nuXmv or strix.
+Every rule preserves the LTL semantics:
+    constant folding of TRUE and FALSE
+    flattening and removal of duplicated operands of & and |
+    a & !a -> FALSE, a | !a -> TRUE, !!a -> a
+    G G a -> G a, F F a -> F a, X TRUE -> TRUE, ...
+    G a & G b -> G (a & b), F a | F b -> F (a | b)"""
+
+
+def _negation(tree: Node) -> Node:
+    if tree is TRUE:
+        return FALSE
+    if tree is FALSE:
+        return TRUE
+    if tree.op == "!":
+        return tree.args[0]
+    return Node("!", tree)
+
+
+def _associative(op: str, args: tuple) -> Node:
+    """Simplifies the operands of & (op='&') and | (op='|')"""
+    if op == "&":
+        neutral, absorbing, merge = TRUE, FALSE, "G"
+    else:
+        neutral, absorbing, merge = FALSE, TRUE, "F"
+
+    operands = {}
+    for arg in args:
+        arg_operands = arg.args if arg.op == op else (arg,)
+        for operand in arg_operands:
+            if operand is absorbing:
+                return absorbing
+            if operand is not neutral:
+                operands[operand] = None
+
+    """G a & G b & ... -> G(a & b & ...), F a | F b | ... -> F(a | b | ...)"""
+    merged = [operand for operand in operands if operand.op == merge]
+    if len(merged) > 1:
+        merged_tree = simplify(Node(merge, Operator(op, *[m.args[0] for m in merged])))
+        result = {}
+        for operand in operands:
+            if operand.op != merge:
+                result[operand] = None
+            elif operand is merged[0]:
+                result[merged_tree] = None
+        return _associative(op, tuple(result))
+
+    for operand in operands:
+        if operand.op == "!" and operand.args[0] in operands:
+            return absorbing
+
+    if len(operands) == 0:
+        return neutral
+    return Operator(op, *operands)
+
+
+@lru_cache(maxsize=100000)
+def simplify(tree: Node) -> Node:
+    """Returns a formula equivalent to 'tree' and not bigger than it"""
+    if tree.is_leaf():
+        return tree
+
+    op = tree.op
+    args = tuple(simplify(arg) for arg in tree.args)
+
+    if op == "&" or op == "|":
+        return _associative(op, args)
+
+    if op == "!":
+        return _negation(args[0])
+
+    if op in ("G", "F", "X", "H", "O", "Y", "Z"):
+        a = args[0]
+        if a is TRUE or a is FALSE:
+            if op == "Y" or op == "Z":
+                """The previous of the initial state is FALSE for Y and TRUE for Z"""
+                return Node(op, a)
+            return a
+        if op in ("G", "F", "H", "O") and a.op == op:
+            return a
+        return Node(op, a)
+
+    if op == "->":
+        a, b = args
+        if a is TRUE:
+            return b
+        if a is FALSE or b is TRUE or a is b:
+            return TRUE
+        if b is FALSE:
+            return _negation(a)
+        return Node(op, a, b)
+
+    if op == "<->":
+        a, b = args
+        if a is b:
+            return TRUE
+        if a is TRUE:
+            return b
+        if b is TRUE:
+            return a
+        if a is FALSE:
+            return _negation(b)
+        if b is FALSE:
+            return _negation(a)
+        return Node(op, a, b)
+
+    if op == "U":
+        a, b = args
+        if b is TRUE or b is FALSE or a is FALSE or a is b:
+            return b
+        if a is TRUE:
+            return simplify(Node("F", b))
+        return Node(op, a, b)
+
+    if op == "V":
+        a, b = args
+        if b is TRUE or b is FALSE or a is TRUE or a is b:
+            return b
+        if a is FALSE:
+            return simplify(Node("G", b))
+        return Node(op, a, b)
+
+    return Node(op, *args)
+
+
+def simplify_formula(formula: str) -> str:
+    """Simplified string form of 'formula', or the formula itself if it cannot be parsed"""
+    try:
+        return str(simplify(parse(formula)))
+    except LTLSyntaxError:
+        return formula
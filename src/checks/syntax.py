@@ -0,0 +1,326 @@
+import re
+import threading
+import weakref
+from functools import lru_cache
+from typing import FrozenSet, List, Set, Union
+
+"""Parser of the NuSMV LTL formulas used by CoGoMo.
+A formula is represented as a tree of hash-consed nodes: structurally equal formulas are the same object,
+so they are compared and hashed in constant time and common sub-formulas are shared in memory.
+    Node("TRUE"), Node("FALSE")                 constants
+    Node("atom", name)                          variable
+    Node("int", value)                          integer literal
+    Node("!", f), Node("G", f), ...             unary operators
+    Node("->", f, g), Node("U", f, g), ...      binary operators
+    Node("&", f, g, ...), Node("|", f, g, ...)  associative operators, flattened and without repeated operands
+    Node("raw", text)                           formula that cannot be parsed, kept as it is written"""
+
+UNARY_TEMPORAL = {"G", "F", "X", "Y", "Z", "H", "O"}
+BINARY_TEMPORAL = {"U", "V", "S", "T"}
+TEMPORAL = UNARY_TEMPORAL | BINARY_TEMPORAL
+
+RELATIONAL = {"=", "!=", "<", ">", "<=", ">="}
+ARITHMETIC = {"+", "-", "*", "/", "mod"}
+
+ASSOCIATIVE = {"&", "|"}
+LEAVES = {"TRUE", "FALSE", "atom", "int", "raw"}
+
+"""Binary operators from the lowest to the highest precedence. '->' is right associative"""
+PRECEDENCE = [
+    {"->"},
+    {"<->"},
+    {"|", "xor", "xnor"},
+    {"&"},
+    BINARY_TEMPORAL,
+    RELATIONAL,
+    {"+", "-"},
+    {"*", "/", "mod"},
+]
+
+TOKEN = re.compile(r'\s*(<->|->|<=|>=|!=|[()!&|=<>+\-*/]|\d+|[A-Za-z_][A-Za-z0-9_.$#]*)')
+
+KEYWORDS = TEMPORAL | {"TRUE", "FALSE", "xor", "xnor", "mod"}
+
+
+class LTLSyntaxError(Exception):
+    pass
+
+
+class Node:
+    """Hash-consed node of the syntax tree, its string form is generated lazily"""
+
+    __slots__ = ("op", "args", "_hash", "_str", "__weakref__")
+
+    _table = weakref.WeakValueDictionary()
+    _lock = threading.Lock()
+
+    def __new__(cls, op: str, *args):
+        key = (op, args)
+        with cls._lock:
+            node = cls._table.get(key)
+            if node is None:
+                node = super().__new__(cls)
+                node.op = op
+                node.args = args
+                node._hash = hash(key)
+                node._str = None
+                cls._table[key] = node
+        return node
+
+    def __hash__(self):
+        return self._hash
+
+    def __str__(self):
+        if self._str is None:
+            self._str = self.__to_string()
+        return self._str
+
+    def __repr__(self):
+        return "Node(" + str(self) + ")"
+
+    def __to_string(self) -> str:
+        if self.op in ("TRUE", "FALSE"):
+            return self.op
+        if self.op == "atom" or self.op == "int" or self.op == "raw":
+            return str(self.args[0])
+        if len(self.args) == 1:
+            child = self.args[0]
+            if child.is_leaf() or child.is_unary():
+                return self.op + "(" + str(child) + ")"
+            return self.op + str(child)
+        return "(" + (" " + self.op + " ").join(arg.__operand() for arg in self.args) + ")"
+
+    def __operand(self) -> str:
+        """The formulas that cannot be parsed are enclosed in parentheses when they are operands"""
+        if self.op == "raw":
+            return "(" + str(self) + ")"
+        return str(self)
+
+    def is_leaf(self) -> bool:
+        return self.op in LEAVES
+
+    def is_unary(self) -> bool:
+        return not self.is_leaf() and len(self.args) == 1
+
+    @property
+    def children(self) -> tuple:
+        if self.is_leaf():
+            return ()
+        return self.args
+
+    def __reduce__(self):
+        """Nodes are interned again when unpickled"""
+        return Node, (self.op,) + self.args
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+TRUE = Node("TRUE")
+FALSE = Node("FALSE")
+
+
+def Atom(name: str) -> Node:
+    return Node("atom", name)
+
+
+def Raw(text: str) -> Node:
+    return Node("raw", text.strip())
+
+
+def Operator(op: str, *args: Node) -> Node:
+    """Builds an operator node, flattening the nested associative operators and removing the repeated operands"""
+    if op in ASSOCIATIVE:
+        flat = {}
+        for arg in args:
+            if arg.op == op:
+                flat.update(dict.fromkeys(arg.args))
+            else:
+                flat[arg] = None
+        if len(flat) == 1:
+            return next(iter(flat))
+        return Node(op, *flat)
+    return Node(op, *args)
+
+
+def tokenize(formula: str) -> List[str]:
+    tokens = []
+    position = 0
+    formula = formula.rstrip()
+    while position < len(formula):
+        match = TOKEN.match(formula, position)
+        if match is None:
+            raise LTLSyntaxError("The syntax of the formula invalid: " + formula[position:])
+        tokens.append(match.group(1))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+
+    def __init__(self, formula: str):
+        self.formula = formula
+        self.tokens = tokenize(formula)
+        self.position = 0
+
+    def peek(self) -> str:
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None
+
+    def next(self) -> str:
+        token = self.peek()
+        if token is None:
+            raise LTLSyntaxError("Unexpected end of formula: " + self.formula)
+        self.position += 1
+        return token
+
+    def expect(self, token: str):
+        if self.next() != token:
+            raise LTLSyntaxError("Expected '" + token + "' in formula: " + self.formula)
+
+    def parse(self) -> Node:
+        tree = self.binary(0)
+        if self.peek() is not None:
+            raise LTLSyntaxError("Unexpected '" + self.peek() + "' in formula: " + self.formula)
+        return tree
+
+    def binary(self, level: int) -> Node:
+        if level == len(PRECEDENCE):
+            return self.unary()
+        left = self.binary(level + 1)
+        while self.peek() in PRECEDENCE[level]:
+            operator = self.next()
+            if operator == "->":
+                """Right associative"""
+                right = self.binary(level)
+            else:
+                right = self.binary(level + 1)
+            left = Operator(operator, left, right)
+        return left
+
+    def unary(self) -> Node:
+        token = self.next()
+        if token == "!" or token in UNARY_TEMPORAL:
+            return Node(token, self.unary())
+        if token == "-":
+            if self.peek() is not None and self.peek().isdigit():
+                return Node("int", -int(self.next()))
+            return Node("-", Node("int", 0), self.unary())
+        if token == "(":
+            tree = self.binary(0)
+            self.expect(")")
+            return tree
+        if token == "TRUE" or token == "FALSE":
+            return Node(token)
+        if token.isdigit():
+            return Node("int", int(token))
+        if token not in KEYWORDS and re.match(r'[A-Za-z_]', token):
+            return Node("atom", token)
+        raise LTLSyntaxError("Unexpected '" + token + "' in formula: " + self.formula)
+
+
+@lru_cache(maxsize=100000)
+def parse(formula: str) -> Node:
+    """Returns the syntax tree of 'formula'"""
+    return _Parser(formula).parse()
+
+
+def to_node(formula: Union[str, Node]) -> Node:
+    if isinstance(formula, Node):
+        return formula
+    return parse(formula)
+
+
+def to_node_or_raw(formula: Union[str, Node]) -> Node:
+    """Syntax tree of 'formula', a 'raw' node keeping the text if it cannot be parsed"""
+    try:
+        return to_node(formula)
+    except LTLSyntaxError:
+        return Raw(formula)
+
+
+def canonical(formula: str) -> str:
+    """Canonical string form of 'formula', or the formula itself if it cannot be parsed"""
+    try:
+        return str(parse(formula))
+    except LTLSyntaxError:
+        return formula
+
+
+def is_temporal(tree: Node) -> bool:
+    """True if the formula contains any temporal operator, or a formula that cannot be parsed"""
+    if tree.op in TEMPORAL or tree.op == "raw":
+        return True
+    return any(is_temporal(arg) for arg in tree.children)
+
+
+def atoms(tree: Node) -> List[str]:
+    """Names of the variables in the formula, in order of appearance"""
+    if tree.op == "atom":
+        return [tree.args[0]]
+    result = {}
+    for arg in tree.children:
+        result.update(dict.fromkeys(atoms(arg)))
+    return list(result)
+
+
+def _relations(tree: Node) -> List[Node]:
+    if tree.op in RELATIONAL:
+        return [tree]
+    result = []
+    for arg in tree.children:
+        result.extend(_relations(arg))
+    return result
+
+
+def integer_atoms(tree: Node) -> Set[str]:
+    """Names of the integer variables: the ones ordered ('<', '>', '<=', '>='), used in arithmetic expressions
+    or compared with integers. Variables compared with "=" or "!=" to variables or to TRUE and FALSE are booleans,
+    unless one of them is an integer"""
+    result = set()
+    equalities = []
+    for relation in _relations(tree):
+        if relation.op in ("=", "!=") and all(arg.op in ("atom", "TRUE", "FALSE") for arg in relation.args):
+            equalities.append(relation)
+        else:
+            result.update(atoms(relation))
+    changed = True
+    while changed:
+        changed = False
+        for relation in equalities:
+            names = set(atoms(relation))
+            if not names.isdisjoint(result) and not names <= result:
+                result |= names
+                changed = True
+    return result
+
+
+@lru_cache(maxsize=100000)
+def atom_set(tree: Node) -> FrozenSet[str]:
+    """Memoized set of the names of the variables in the formula"""
+    return frozenset(atoms(tree))
+
+
+def conjuncts(tree: Node) -> tuple:
+    """Operands of the conjunction 'tree', or 'tree' itself if it is not a conjunction"""
+    if tree.op == "&":
+        return tree.args
+    return (tree,)
+
+
+@lru_cache(maxsize=100000)
+def size(tree: Node) -> int:
+    """Number of nodes of the syntax tree, the shared sub-formulas are counted each time they appear"""
+    return 1 + sum(size(arg) for arg in tree.children)
+
+
+def formula_size(formula: str) -> int:
+    """Size of the syntax tree of the formula, its length if it cannot be parsed"""
+    try:
+        return size(parse(formula))
+    except LTLSyntaxError:
+        return len(formula)
@@ -1,4 +1,11 @@
-from typing import Dict
+import hashlib
+import logging
+import os
+import pickle
+from typing import Callable, Dict, FrozenSet, Iterator, Optional, Set, Tuple
+from checks.nusmv import check_many
+from helper.logger import get_logger
+from helper.profiling import profiled
 from src.contracts.helpers import incomposable_check
 from src.contracts.contract import *
 
@@ -6,11 +13,145 @@ import itertools as it
 
 from typescogomo.formulae import LTL, LTLs
 
+logger = get_logger(__name__)
+
+"""Maximum number of candidate compositions with the same lowest cost given to the greedy selection,
+set COGOMO_MAX_CANDIDATES to change it"""
+MAX_CANDIDATES = int(os.environ.get("COGOMO_MAX_CANDIDATES", 100))
+
+"""Version of the format of the snapshots of the libraries, snapshots of other versions are not loaded"""
+SNAPSHOT_VERSION = 2
+
+"""Format of the keys of the relations of the libraries, change it whenever the keys change so that the relations
+saved with other keys are not restored"""
+RELATIONS_KEYS = "provides: (id, signature, signature); composable: (id, id); compatible: (signature, id, signature)"
+
 
 class NoComponentsAvailable(Exception):
     pass
 
 
+def composition_cost(composition: List['Component']) -> float:
+    """Cost of the components plus a cost for the number of components, lower is better"""
+    cost = 0
+    for component in composition:
+        cost += component.cost()
+        cost += 0.1
+    return round(cost, 9)
+
+
+def signature(ltl: LTL) -> str:
+    """Key of a formula in the relations of the library: the formula and the declarations of its variables
+    (name, port type and basic type), on which the queries depend"""
+    declarations = sorted(v.name + ":" + v.port_type + ":" + v.basic_type for v in ltl.variables.list)
+    return ltl.formula + " | " + " ".join(declarations)
+
+
+def minimal_covers(propositions: List[LTL], providers: Dict[LTL, List['Component']], cheapest: bool = True,
+                   ports: Dict[str, int] = None, max_ties: int = None,
+                   composable: Callable[['Component', 'Component'], bool] = None) \
+        -> Iterator[Tuple[float, List['Component']]]:
+    """Generates lazily the (cost, composition) of the compositions of components that provide all the 'propositions'
+    (weighted set cover), where 'providers' are the components that can provide each proposition.
+    'ports' is the number of variables needed for each port type: a composition having variables of a port type
+    must have at least that many, otherwise it is extended with other providers having variables of that port type.
+    Only the compositions that can be composed and where no component can be removed are generated, each once.
+    The search branches on the first proposition not yet provided, trying the cheapest components first.
+    If 'cheapest', the branches costing more than the cheapest composition generated so far are pruned
+    (branch and bound): the compositions with the lowest cost are the last ones generated.
+    After 'max_ties' compositions with the lowest cost, the branches with the same cost are pruned too.
+    'composable(a, b)' tells if two components can be composed, by default it is checked once per pair"""
+    if ports is None:
+        ports = {}
+
+    provides: Dict['Component', Set[int]] = {}
+    for i, proposition in enumerate(propositions):
+        for component in providers[proposition]:
+            provides.setdefault(component, set()).add(i)
+
+    ordered = [sorted(providers[proposition], key=lambda c: c.cost()) for proposition in propositions]
+
+    """All the providers, in the order in which they extend a composition missing some ports"""
+    extensions = sorted(provides.keys(), key=lambda c: c.cost())
+
+    port_counts: Dict['Component', Dict[str, int]] = {}
+    for component in extensions:
+        counts = port_counts[component] = {}
+        for v in component.variables.list:
+            counts[v.port_type] = counts.get(v.port_type, 0) + 1
+
+    def missing_ports(composition: List['Component']) -> Set[str]:
+        """Port types of the variables of the composition that have fewer variables than needed"""
+        counts: Dict[str, int] = {}
+        for component in composition:
+            for port, n in port_counts[component].items():
+                counts[port] = counts.get(port, 0) + n
+        return set(port for port, n in counts.items() if port in ports and n < ports[port])
+
+    if composable is None:
+        """The composability of each pair of components is checked at most once"""
+        composable_pairs: Dict[Tuple[int, int], bool] = {}
+
+        def composable(a: 'Component', b: 'Component') -> bool:
+            key = (id(a), id(b)) if id(a) < id(b) else (id(b), id(a))
+            if key not in composable_pairs:
+                composable_pairs[key] = not incomposable_check([a, b])
+            return composable_pairs[key]
+
+    generated: Set[FrozenSet[int]] = set()
+    best_cost = [float("inf")]
+    ties = [0]
+
+    def search(chosen: List['Component'], covered: Set[int], extended: int) \
+            -> Iterator[Tuple[float, List['Component']]]:
+        """'extended': position in 'extensions' of the last component added for the ports, -1 if none"""
+        cost = composition_cost(chosen)
+        if cheapest and (cost > best_cost[0] or (cost == best_cost[0] and max_ties is not None and
+                                                 ties[0] >= max_ties)):
+            return
+        uncovered = next((i for i in range(len(propositions)) if i not in covered), None)
+        if uncovered is None:
+            """Irredundant: without any component, some proposition is not provided or some port is missing"""
+            for component in chosen:
+                others = [other for other in chosen if other is not component]
+                others_provide = set()
+                for other in others:
+                    others_provide |= provides[other]
+                if provides[component] <= others_provide and len(missing_ports(others)) == 0:
+                    return
+
+            missing = missing_ports(chosen)
+            if len(missing) > 0:
+                """Extend the composition with the providers having variables of the missing ports"""
+                for position in range(extended + 1, len(extensions)):
+                    component = extensions[position]
+                    if component in chosen or missing.isdisjoint(port_counts[component]):
+                        continue
+                    if not all(composable(component, other) for other in chosen):
+                        continue
+                    yield from search(chosen + [component], covered, position)
+                return
+
+            key = frozenset(id(c) for c in chosen)
+            if key not in generated:
+                generated.add(key)
+                if cost < best_cost[0]:
+                    best_cost[0] = cost
+                    ties[0] = 0
+                ties[0] += 1
+                yield cost, list(chosen)
+            return
+
+        for component in ordered[uncovered]:
+            if component in chosen:
+                continue
+            if not all(composable(component, other) for other in chosen):
+                continue
+            yield from search(chosen + [component], covered | provides[component], extended)
+
+    yield from search([], set(), -1)
+
+
 class Component(Contract):
     """Component class extending Contract"""
 
@@ -66,7 +207,9 @@ class Component(Contract):
 
 
 class ComponentsLibrary:
-    """Component Library defined a list of components and the operations on them"""
+    """Component Library defined a list of components and the operations on them.
+    The relations between the components computed during the selections are kept in the library and can be saved
+    with it (see 'save', 'load' and 'restore'), the components are identified by their ids"""
 
     def __init__(self,
                  name: str,
@@ -76,10 +219,25 @@ class ComponentsLibrary:
         self.__name = name
 
         """List of Components in the Library"""
-        if components is None:
-            self.__components = []
-        else:
-            self.__components = components
+        self.__components = []
+
+        """Index: port type -> components whose guarantees have a variable of that port type"""
+        self.__port_index: Dict[str, List[Component]] = {}
+
+        """Provides relation: (component id, guarantees, formula) -> True if the guarantees can provide for the formula.
+        The formulas are keyed by their 'signature'. The keys are strings, so that the relation can be saved
+        with the library"""
+        self.__provides: Dict[Tuple[str, str, str], bool] = {}
+
+        """Composability: (component id, component id), sorted -> True if the components can be composed"""
+        self.__composable: Dict[Tuple[str, str], bool] = {}
+
+        """Compatibility: (assumptions, component id, assumptions of the component) -> True if the assumptions
+        of the component are consistent with the assumptions"""
+        self.__compatible: Dict[Tuple[str, str, str], bool] = {}
+
+        if components is not None:
+            self.add_components(components)
 
     @property
     def name(self):
@@ -95,17 +253,139 @@ class ComponentsLibrary:
 
     @components.setter
     def components(self, value: List[Component]):
-        self.__components = value
+        self.__components = []
+        self.__port_index = {}
+        self.__provides = {}
+        self.__composable = {}
+        self.__compatible = {}
+        self.add_components(value)
 
     def add_component(self, component: Component):
 
         self.components.append(component)
 
+        for port in set(v.port_type for v in component.guarantees.formula.variables.list):
+            self.__port_index.setdefault(port, []).append(component)
+
     def add_components(self, components: List[Component]):
 
         for component in components:
             self.add_component(component)
 
+    def composable(self, a: Component, b: Component) -> bool:
+        key = (a.id, b.id) if a.id < b.id else (b.id, a.id)
+        if key not in self.__composable:
+            self.__composable[key] = not incomposable_check([a, b])
+        return self.__composable[key]
+
+    def compatible(self, assumptions: Assumptions, component: Component) -> bool:
+        key = (signature(assumptions.formula), component.id, signature(component.assumptions.formula))
+        if key not in self.__compatible:
+            self.__compatible[key] = assumptions.are_satisfiable_with(component.assumptions)
+        return self.__compatible[key]
+
+    def content_hash(self) -> str:
+        """Hash of the formulas and of the variables of the components and of the format of the keys of the relations,
+        it changes if any relation could change"""
+        text = str(SNAPSHOT_VERSION) + "\n" + RELATIONS_KEYS + "\n"
+        for component in self.components:
+            text += component.id + "\n"
+            for ltls in [component.assumptions, component.guarantees]:
+                text += " ".join(ltls.formula.formula.split()) + "\n"
+                text += " ".join(sorted(v.name + ":" + v.basic_type + ":" + v.port_type
+                                        for v in ltls.variables.list)) + "\n"
+        return hashlib.sha256(text.encode("UTF-8")).hexdigest()
+
+    @property
+    def relations(self) -> Dict[str, dict]:
+        return {"provides": self.__provides,
+                "composable": self.__composable,
+                "compatible": self.__compatible}
+
+    def save(self, file_path: str):
+        """Saves the components and their relations computed so far"""
+        dirname = os.path.dirname(file_path)
+        if dirname != "" and not os.path.exists(dirname):
+            os.makedirs(dirname, exist_ok=True)
+        snapshot = {"version": SNAPSHOT_VERSION,
+                    "hash": self.content_hash(),
+                    "name": self.name,
+                    "components": self.components,
+                    "relations": self.relations}
+        """Written to a temporary file first, so that an interrupted save does not leave a broken snapshot"""
+        with open(file_path + ".tmp", "wb") as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(file_path + ".tmp", file_path)
+
+    @staticmethod
+    def load_snapshot(file_path: str) -> Optional[dict]:
+        """The snapshot in 'file_path', None if it does not exist or has another version"""
+        if not os.path.exists(file_path):
+            return None
+        try:
+            with open(file_path, "rb") as f:
+                snapshot = pickle.load(f)
+        except Exception as e:
+            logger.warning("Library snapshot %s cannot be read (%s)", file_path, e)
+            return None
+        if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+            logger.info("Library snapshot %s has another version", file_path)
+            return None
+        return snapshot
+
+    @staticmethod
+    def load(file_path: str) -> Optional['ComponentsLibrary']:
+        """The library saved in 'file_path' with its relations, None if there is no valid snapshot"""
+        snapshot = ComponentsLibrary.load_snapshot(file_path)
+        if snapshot is None:
+            return None
+        library = ComponentsLibrary(name=snapshot["name"], components=snapshot["components"])
+        if library.content_hash() != snapshot["hash"]:
+            return None
+        library.__set_relations(snapshot["relations"])
+        return library
+
+    def restore(self, file_path: str) -> bool:
+        """Restores the relations saved in 'file_path' if it is a snapshot of a library with the same components,
+        returns True if they have been restored"""
+        snapshot = ComponentsLibrary.load_snapshot(file_path)
+        if snapshot is None or snapshot["hash"] != self.content_hash():
+            return False
+        self.__set_relations(snapshot["relations"])
+        return True
+
+    def __set_relations(self, relations: Dict[str, dict]):
+        self.__provides.update(relations["provides"])
+        self.__composable.update(relations["composable"])
+        self.__compatible.update(relations["compatible"])
+
+    def candidates_for(self, formula: LTL) -> List[Component]:
+        """Components whose guarantees share at least a port type with 'formula', in the order of the library.
+        The guarantees of the other components can provide for 'formula' only if it is valid or they are
+        inconsistent. All the components are returned if 'formula' has no variables"""
+        ports = set(v.port_type for v in formula.variables.list)
+        if len(ports) == 0:
+            return self.components
+        indexed = set()
+        for port in ports:
+            indexed.update(id(component) for component in self.__port_index.get(port, []))
+        return [component for component in self.components if id(component) in indexed]
+
+    def provides(self, pairs: List[Tuple[LTL, Component]]) -> List[bool]:
+        """For each (formula, component), True if the guarantees of the component can provide for the formula.
+        The pairs not checked before are checked concurrently"""
+        keys = [(component.id, signature(component.guarantees.formula), signature(formula))
+                for formula, component in pairs]
+        to_check = {}
+        for key, (formula, component) in zip(keys, pairs):
+            if key not in self.__provides and key not in to_check:
+                to_check[key] = component.guarantees.formula.can_provide_for_query(formula)
+        if len(to_check) > 0:
+            for key, result in zip(to_check.keys(), check_many(list(to_check.values()))):
+                self.__provides[key] = result
+        return [self.__provides[key] for key in keys]
+
+    @profiled("extract_selection")
     def extract_selection(self,
                           assumptions: Assumptions,
                           to_be_refined: LTLs) -> List[List['Component']]:
@@ -132,89 +412,48 @@ class ComponentsLibrary:
         if len(to_be_refined.list) == 0:
             return []
 
-        for formula in to_be_refined.list:
+        """Check if the components indexed by the ports of each formula refine it"""
+        formula_component_pairs = [(formula, component)
+                                   for formula in to_be_refined.list for component in self.candidates_for(formula)]
+        can_provide = self.provides(formula_component_pairs)
 
-            """Check if any component guarantees refine the to_be_refined"""
-            for component in self.components:
+        for (formula, component), provides in zip(formula_component_pairs, can_provide):
 
-                if component.guarantees.formula.can_provide_for(formula):
+            if provides:
 
-                    """Check if contracts have compatible assumptions with the one provided"""
-                    compatible = assumptions.are_satisfiable_with(component.assumptions)
+                """Check if contracts have compatible assumptions with the one provided"""
+                compatible = self.compatible(assumptions, component)
 
-                    """If the contract has compatible assumptions, add it to the list of contracts 
-                    that can refine to_be_refined"""
-                    if compatible:
-                        if formula in candidates_for_each_proposition:
-                            if component not in candidates_for_each_proposition[formula]:
-                                candidates_for_each_proposition[formula].append(component)
-                        else:
-                            candidates_for_each_proposition[formula] = [component]
+                """If the contract has compatible assumptions, add it to the list of contracts 
+                that can refine to_be_refined"""
+                if compatible:
+                    if formula in candidates_for_each_proposition:
+                        if component not in candidates_for_each_proposition[formula]:
+                            candidates_for_each_proposition[formula].append(component)
+                    else:
+                        candidates_for_each_proposition[formula] = [component]
 
         """Check that all the propositions of to_be_refined can be refined"""
         if not all(props in candidates_for_each_proposition for props in to_be_refined.list):
             raise NoComponentsAvailable(
                 "The specification cannot be refined further with the components in the library")
 
-        """Create candidate compositions, each refining to_be_refined"""
-        candidates_compositions = [[value for (key, value) in zip(candidates_for_each_proposition, values)]
-                                   for values in it.product(*candidates_for_each_proposition.values())]
-
-        """Eliminate duplicate components (a component might refine multiple propositions)"""
-        for i, c in enumerate(candidates_compositions):
-            c = list(set(c))
-            candidates_compositions[i] = c
-
-        """Eliminate candidates that cannot be composed"""
-        candidates_compositions[:] = it.filterfalse(incomposable_check, candidates_compositions)
-
-        """List of candidates to remove"""
+        """Create the candidate compositions with the lowest cost, each refining to_be_refined"""
         candidates_compositions_filtered = []
-
-        """Filter candidates that cannot provide for all the ports"""
-        for candidate in list(candidates_compositions):
-
-            comps_id = set()
-            for comp in candidate:
-                comps_id.add(comp.id)
-
-            already_there = False
-
-            for candidate_filtered in candidates_compositions_filtered:
-
-                comps_id_filtered = set()
-
-                for comp in candidate_filtered:
-                    comps_id_filtered.add(comp.id)
-
-                if all(c in comps_id for c in comps_id_filtered):
-                    already_there = True
-
-            if already_there:
-                continue
-
-            ports_n_candidate: Dict[str, int] = {}
-
-            for component in candidate:
-                for v in component.variables.list:
-                    if v.port_type not in ports_n_candidate:
-                        ports_n_candidate[v.port_type] = 1
-                    else:
-                        ports_n_candidate[v.port_type] += 1
-
-            all_covered = True
-            for port, n in ports_n_candidate.items():
-                if port in ports_n and ports_n_candidate[port] < ports_n[port]:
-                    all_covered = False
-            if all_covered:
+        lowest_cost = float("inf")
+        for cost, candidate in minimal_covers(to_be_refined.list, candidates_for_each_proposition,
+                                              ports=ports_n, max_ties=MAX_CANDIDATES,
+                                              composable=self.composable):
+            if cost < lowest_cost:
+                lowest_cost = cost
+                candidates_compositions_filtered = []
+            if cost == lowest_cost:
                 candidates_compositions_filtered.append(candidate)
 
-        print(str(len(candidates_compositions_filtered)) + " candidate compositions found:")
-        for i, candidate in enumerate(candidates_compositions_filtered):
-            print("\tcandidate_" + str(i) + ":")
-            for component in candidate:
-                print(str(component))
-            print("\n")
+        logger.info("%d candidate compositions found:", len(candidates_compositions_filtered))
+        if logger.isEnabledFor(logging.DEBUG):
+            for i, candidate in enumerate(candidates_compositions_filtered):
+                logger.debug("\tcandidate_%d:\n%s\n", i, "\n".join(str(component) for component in candidate))
 
         if len(candidates_compositions_filtered) == 0:
             raise NoComponentsAvailable
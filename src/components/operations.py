@@ -1,9 +1,21 @@
 from src.components.components import *
-import itertools as it
-import operator
-from typing import Tuple, List
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple, List
 
+from helper.logger import get_logger
+from helper.profiling import profiled, profiler
 
+logger = get_logger(__name__)
+
+"""Number of components whose assumptions are searched concurrently by components_selection,
+set COGOMO_SELECTION_WORKERS to change it"""
+SELECTION_WORKERS = int(os.environ["COGOMO_SELECTION_WORKERS"]) if "COGOMO_SELECTION_WORKERS" in os.environ \
+    else (os.cpu_count() or 1)
+
+
+@profiled("components_selection")
 def components_selection(component_library: ComponentsLibrary, specification: Contract) \
         -> Tuple[List[Component], Dict[Component, List[Component]]]:
     """ 1)  Search in the 'component_library' compositions of components that can refine the 'specification'.
@@ -23,46 +35,51 @@ def components_selection(component_library: ComponentsLibrary, specification: Co
 
     first_selected_components = greedy_selection(candidates_compositions)
 
-    print("Selected components " + str([component.id for component in first_selected_components]) + " out of " +
-          str(len(candidates_compositions)) + " candidates")
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Selected components %s out of %d candidates",
+                    [component.id for component in first_selected_components], len(candidates_compositions))
 
     set_components_to_return.append(first_selected_components)
 
-    components_to_search = first_selected_components.copy()
-    component_already_searched = []
-
     component_provided_by = {}
 
-    while len(components_to_search) != 0:
-
-        print("Looking for components that refine the assumptions")
-        components_to_search_copy = components_to_search.copy()
-
-        for component in components_to_search_copy:
-
-            """Remove component from list of components to search 
-            and keep track that it has been searched (avoid loops)"""
-            components_to_search.remove(component)
-            component_already_searched.append(component)
-
-            component_assumptions = component.assumptions
-
-            if component_assumptions.is_universe():
+    def providers_of(component: Component) -> Optional[Tuple[List[Component], int]]:
+        """Greedly select one composition that can provide the assumptions of 'component', if they exists,
+        returns the composition and the number of candidates"""
+        if component.assumptions.is_universe():
+            return None
+        try:
+            candidates = component_library.extract_selection(spec_assumptions, component.assumptions)
+        except NoComponentsAvailable:
+            return None
+        return greedy_selection(candidates), len(candidates)
+
+    """Breadth-first search of the components that refine the assumptions, the components of each level are
+    searched concurrently and share the relations memoized in the library.
+    Each component is searched once (avoid loops)"""
+    level = list(dict.fromkeys(first_selected_components))
+    component_already_searched = set(level)
+
+    while len(level) != 0:
+
+        logger.info("Looking for components that refine the assumptions of %d components", len(level))
+        if len(level) == 1 or SELECTION_WORKERS <= 1:
+            level_providers = [providers_of(component) for component in level]
+        else:
+            with ThreadPoolExecutor(max_workers=min(SELECTION_WORKERS, len(level))) as executor:
+                level_providers = list(executor.map(profiler.in_current_operation(providers_of), level))
+
+        next_level = []
+        for component, providers in zip(level, level_providers):
+
+            if providers is None:
+                logger.info("No further found")
                 continue
 
-            """Extract all candidate compositions that can provide the assumptions, if they exists"""
-            try:
-                candidates_compositions = component_library.extract_selection(spec_assumptions,
-                                                                              component_assumptions)
-            except NoComponentsAvailable:
-                print("No further found")
-                continue
-
-            """Greedly select one composition"""
-            new_selected_components = greedy_selection(candidates_compositions)
-            print("Selected components " + str(
-                [component.id for component in new_selected_components]) + " out of " +
-                  str(len(candidates_compositions)) + " candidates")
+            new_selected_components, n_candidates = providers
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Selected components %s out of %d candidates",
+                            [component.id for component in new_selected_components], n_candidates)
 
             if new_selected_components not in set_components_to_return:
                 set_components_to_return.append(new_selected_components)
@@ -70,7 +87,8 @@ def components_selection(component_library: ComponentsLibrary, specification: Co
             """Add components to be searched only if they have not already been searched before"""
             for comp in new_selected_components:
                 if comp not in component_already_searched:
-                    components_to_search.append(comp)
+                    component_already_searched.add(comp)
+                    next_level.append(comp)
 
             if len(new_selected_components) > 0:
                 if component in component_provided_by:
@@ -78,21 +96,25 @@ def components_selection(component_library: ComponentsLibrary, specification: Co
                 else:
                     component_provided_by[component] = new_selected_components
 
+        level = next_level
+
     """Flattening list of selections and eliminating duplicates"""
     flat_list_refining_components = list(set([item for sublist in set_components_to_return for item in sublist]))
 
-    print(str(len(flat_list_refining_components)) +
-          " components found in the library that composed refine the specifications:")
+    logger.info("%d components found in the library that composed refine the specifications:",
+                len(flat_list_refining_components))
 
-    for n, l in enumerate(set_components_to_return):
-        ret = "\t" * n
-        for component in l:
-            ret += component.id + " "
-        print(ret)
+    if logger.isEnabledFor(logging.INFO):
+        for n, l in enumerate(set_components_to_return):
+            ret = "\t" * n
+            for component in l:
+                ret += component.id + " "
+            logger.info("%s", ret)
 
     return flat_list_refining_components, component_provided_by
 
 
+@profiled("greedy_selection")
 def greedy_selection(candidate_compositions: List[List[Component]]) -> List[Component]:
     """ Scan all the possible compositions and compute costs for each of them,
     If there are multiple compositions iwth the same cost, pick the more refined one
@@ -100,63 +122,57 @@ def greedy_selection(candidate_compositions: List[List[Component]]) -> List[Comp
 
     """If only one candidate return that one"""
     if len(candidate_compositions) == 1:
-        print("\tgreedly seelected the only candidate")
+        logger.info("\tgreedly seelected the only candidate")
         return candidate_compositions[0]
 
     best_candidates = []
     lowest_cost = float('inf')
 
-    print("Choosing greedly one composition...")
+    logger.info("Choosing greedly one composition...")
 
     for composition in candidate_compositions:
-        cost = 0
-        for component in composition:
-            cost += component.cost()
-            """Adding a cost for the number of components"""
-            cost += 0.1
+        cost = composition_cost(composition)
         if cost < lowest_cost:
+            lowest_cost = cost
             best_candidates = [composition]
         elif cost == lowest_cost:
             best_candidates.append(composition)
 
     if len(best_candidates) == 1:
-        print("\tgreedly seelected the best candidate based on cost")
+        logger.info("\tgreedly seelected the best candidate based on cost")
         return best_candidates[0]
 
-    else:
-        """Keep score of the candidates"""
-
-        """Dict: candidate_id -> points"""
-        candidates_points = {}
-        for candidate in best_candidates:
-            candidates_points[tuple(candidate)] = 0
-
-        print("Generating pairs for all " + str(len(best_candidates)) + " candidates")
-        candidate_pairs = it.combinations(best_candidates, 2)
-
-        n_comparisons = 0
-
-        for candidate_a, candidate_b in candidate_pairs:
-
-            contract_a = Contract()
-            contract_b = Contract()
-
-            for component_a in candidate_a:
-                contract_a.merge_with(component_a)
-
-            for component_b in candidate_b:
-                contract_b.merge_with(component_b)
-
-            if contract_a.refines(contract_b):
-                candidates_points[tuple(candidate_a)] += 1
-            else:
-                candidates_points[tuple(candidate_b)] += 1
-
-            n_comparisons += 1
-
-        print(str(n_comparisons) + " comparisons have been made")
-        """Extract the candidate with the highest score (the most refined)"""
-        best_candidate = max(candidates_points.items(), key=operator.itemgetter(1))[0]
-
-        print("\tgreedly seelected the best candidate based on biggest assumption set")
-        return list(best_candidate)
+    """The contract of each candidate is composed once"""
+    contracts = []
+    for candidate in best_candidates:
+        contract = Contract()
+        for component in candidate:
+            contract.merge_with(component)
+        contracts.append(contract)
+
+    """Each pair of candidates is compared at most once in each direction"""
+    refinements: Dict[Tuple[int, int], bool] = {}
+
+    def refines(i: int, j: int) -> bool:
+        if (i, j) not in refinements:
+            refinements[(i, j)] = contracts[i].refines(contracts[j])
+        return refinements[(i, j)]
+
+    """Maximal candidates: the ones not refined by any other candidate. 
+    A candidate refined by a maximal one is discarded, a candidate refining some maximal ones replaces them.
+    Among equivalent candidates the first one is kept"""
+    maximal = []
+    for i in range(len(best_candidates)):
+        if any(refines(j, i) for j in maximal):
+            continue
+        maximal = [j for j in maximal if not refines(i, j)]
+        maximal.append(i)
+
+    logger.info("%d comparisons have been made, %d maximal candidates out of %d",
+                len(refinements), len(maximal), len(best_candidates))
+
+    """Extract the first of the most refined candidates"""
+    best_candidate = best_candidates[min(maximal)]
+
+    logger.info("\tgreedly seelected the best candidate based on biggest assumption set")
+    return best_candidate
@@ -50,6 +50,14 @@ class Contract:
         self.__guarantees = values
 
 
+    def copy(self) -> 'Contract':
+        """Copy of the contract that can be modified independently, the formulas are shared"""
+        new = object.__new__(type(self))
+        new.__dict__.update(self.__dict__)
+        new.assumptions = self.assumptions.copy()
+        new.guarantees = self.guarantees.copy()
+        return new
+
     def set_context(self, context: Context):
         self.guarantees.set_context(context)
 
@@ -62,6 +70,9 @@ class Contract:
         self.check_feasibility()
 
     def check_feasibility(self):
+        """The formulas are not checked when they are created, their satisfiability is memoized once checked"""
+        self.assumptions.validate()
+        self.guarantees.validate()
         if not self.assumptions.are_satisfiable_with(self.guarantees):
             raise UnfeasibleContracts(self.assumptions, self.guarantees)
 
@@ -1,8 +1,10 @@
-from copy import deepcopy
 from typing import List
 from src.contracts.contract import Contract, InconsistentContracts, IncompatibleContracts, UnfeasibleContracts
+from helper.logger import get_logger
 from typescogomo.formula import InconsistentException
 
+logger = get_logger(__name__)
+
 
 def compose_contracts(contracts: List[Contract]) -> Contract:
     """Composition operation among list of contracts"""
@@ -12,24 +14,24 @@ def compose_contracts(contracts: List[Contract]) -> Contract:
     if len(contracts) == 0:
         raise Exception("No contract specified in the composition")
 
-    new_contract = deepcopy(contracts[0])
+    new_contract = contracts[0].copy()
 
     """Populate the data structure while checking for compatibility and consistency"""
     for contract in contracts[1:]:
         try:
             new_contract.merge_with(contract)
         except InconsistentContracts as e:
-            print("Contracts inconsistent")
+            logger.info("Contracts inconsistent")
             raise e
         except IncompatibleContracts as e:
-            print("Contracts incompatible")
+            logger.info("Contracts incompatible")
             raise e
         except UnfeasibleContracts as e:
-            print("Contracts unfeasible")
+            logger.info("Contracts unfeasible")
             raise e
 
 
-    print("The composition is compatible, consistent and feasible")
+    logger.info("The composition is compatible, consistent and feasible")
 
     a_removed = []
     g_used = []
@@ -38,11 +40,10 @@ def compose_contracts(contracts: List[Contract]) -> Contract:
         for g_elem in list(new_contract.guarantees.list):
             if g_elem not in g_used and a_elem not in a_removed:
                 if g_elem <= a_elem:
-                    print("Simplifying assumption " + str(a_elem))
+                    logger.debug("Simplifying assumption %s", a_elem)
                     new_contract.assumptions.remove(a_elem)
                     g_used.append(g_elem)
                     a_removed.append(a_elem)
 
-    print("Composed contract:")
-    print(new_contract)
+    logger.debug("Composed contract:\n%s", new_contract)
     return new_contract
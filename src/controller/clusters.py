@@ -0,0 +1,61 @@
+from typing import List, Tuple
+
+from controller.synthesis import create_controller_if_exists, SynthesisException
+from goals.cgtgoal import CGTGoal
+from goals.helpers import generate_general_controller_inputs_from_goal, generate_controller_input_text
+from helper.logger import get_logger
+from helper.parallel import run_parallel
+from helper.tools import save_to_file
+from typescogomo.formula import OrLTL
+
+"""Realizability and time of the clusters whose job has been terminated"""
+TIMEOUT_RESULT = (False, -100.0)
+
+logger = get_logger(__name__)
+
+
+def generate_controller_from_cgt(ap: dict, rules: dict, cgt: CGTGoal, folder_path: str, complete: bool) \
+        -> Tuple[bool, float]:
+    assum, guaran, ins, outs = generate_general_controller_inputs_from_goal(ap, rules, cgt, complete)
+    save_to_file(generate_controller_input_text(assum, guaran, ins, outs),
+                 folder_path + "specification.txt")
+
+    exec_time = 0.0
+    realizable = False
+    try:
+        controller_generated, exec_time = create_controller_if_exists(folder_path + "specification.txt")
+        realizable = controller_generated
+
+    except SynthesisException as e:
+        if e.os_not_supported:
+            logger.warning("Os not supported for synthesis. Only linux can run strix")
+        elif e.trivial:
+            logger.warning("The assumptions are not satisfiable. The controller is trivial.")
+            raise Exception("Assumptions unsatisfiable in a CGT is impossible.")
+
+    return realizable, exec_time
+
+
+def synthesize_cluster(job: Tuple[dict, dict, CGTGoal, str, bool]) -> Tuple[bool, float]:
+    """job: (ap, rules, cluster_goal, folder_path, complete)"""
+    from helper.buchi import generate_buchi
+    ap, rules, goal, folder_path, complete = job
+    generate_buchi(OrLTL(goal.context), folder_path + "context")
+    return generate_controller_from_cgt(ap, rules, goal, folder_path, complete)
+
+
+def generate_controllers_from_cgt_clustered(ap: dict, rules: dict, cgt: CGTGoal, folder_path: str, complete: bool,
+                                            workers: int = None, timeout: float = None) \
+        -> Tuple[List[bool], List[float]]:
+    """Synthetize the controller for each branch of the CGT, the branches are independent and run in parallel.
+    The results are in the order of the branches"""
+    logger.info("\n\nSynthetize the controller for the branches of the CGT composing it with the new context")
+    jobs = []
+    for i, goal in enumerate(cgt.refined_by):
+        jobs.append((ap, rules, goal, folder_path + "cluster_" + str(i) + "/", complete))
+
+    results = run_parallel(synthesize_cluster, jobs, workers, timeout, default=TIMEOUT_RESULT)
+
+    realizables = [realizable for realizable, _ in results]
+    exec_times = [exec_time for _, exec_time in results]
+    return realizables, exec_times
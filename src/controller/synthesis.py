@@ -1,22 +1,45 @@
 import os
+import re
 import subprocess
 import sys
 import platform
 import time
-from typing import Tuple
+from typing import List, Tuple
 
 
 from graphviz import Source
 
+from checks.cache import ResultCache, canonical_key
 from checks.nusmv import check_satisfiability
+from checks.simplify import simplify_formula
+from checks.syntax import parse, atom_set, formula_size, LTLSyntaxError
 from checks.tools import Implies
 from controller.parser import parse_controller
+from helper.logger import get_logger
+from helper.profiling import profiler, profiled
 from helper.tools import save_to_file
 
 strix_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'bin', 'ubuntu_19_10', 'strix'))
 
 output_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'output', 'clustering'))
 
+"""Seconds after which strix is stopped, set COGOMO_SYNTHESIS_TIMEOUT to change it"""
+SYNTHESIS_TIMEOUT = float(os.environ.get("COGOMO_SYNTHESIS_TIMEOUT", 3600))
+
+"""Check with nuXmv that the guarantees are satisfiable before calling strix, set COGOMO_SYNTHESIS_PRECHECK=0
+to skip it"""
+PRECHECK_GUARANTEES = os.environ.get("COGOMO_SYNTHESIS_PRECHECK", "1") != "0"
+
+"""Results of strix shared across runs: {"realizable": bool, "controller": DOT or None, "time": sec}.
+The controller is None when only the realizability has been checked"""
+strix_cache = ResultCache("strix")
+
+"""Strix processes started by this process and results taken from 'strix_cache' instead.
+A lookup of 'strix_cache' can hit an entry without the controller and still start strix"""
+strix_counts = {"calls": 0, "cache_hits": 0}
+
+logger = get_logger(__name__)
+
 
 class SynthesisException(Exception):
     def __init__(self, reason: "str"):
@@ -32,43 +55,112 @@ class SynthesisException(Exception):
             raise Exception("Unknown exeption: " + reason)
 
 
-def is_realizable(assumptions: str, guarantees: str, ins: str, outs: str) -> bool:
+def strix_formula(assumptions: str, guarantees: str) -> str:
+    """Returns the simplified formula 'assumptions -> guarantees' in the syntax of strix"""
+    formula = Implies(assumptions, guarantees)
+    formula = re.sub(r'\btrue\b', 'TRUE', formula)
+    formula = re.sub(r'\bfalse\b', 'FALSE', formula)
+    formula = simplify_formula(formula)
+    formula = re.sub(r'\bTRUE\b', 'true', formula)
+    return re.sub(r'\bFALSE\b', 'false', formula)
+
+
+def synthesis_key(formula: str, ins: str, outs: str) -> str:
+    """Content address of a synthesis problem: the strix formula and the sets of input and output variables"""
+    declarations = ["input " + x.strip() for x in ins.split(",") if x.strip() != ""]
+    declarations += ["output " + x.strip() for x in outs.split(",") if x.strip() != ""]
+    return canonical_key(declarations, formula)
+
+
+def check_realizability(assumptions: str, guarantees: str, ins: str, outs: str) -> Tuple[bool, float]:
+    """Runs strix without building the controller, returns the realizability and the time strix needed"""
     try:
-        params = ' --realizability -f "' + Implies(assumptions,
-                                                   guarantees) + '" --ins="' + ins + '" --outs="' + outs + '"'
+        formula = strix_formula(assumptions, guarantees)
+        key = synthesis_key(formula, ins, outs)
+        cached = strix_cache.get(key)
+        if cached is not None:
+            profiler.record("strix_cache", size=formula_size(formula))
+            strix_counts["cache_hits"] += 1
+            return cached["realizable"], cached["time"]
+
+        params = ' --realizability -f "' + formula + '" --ins="' + ins + '" --outs="' + outs + '"'
         command = strix_path + params
-        print("\n\nRUNNING COMMAND:\n\n" + command + "\n\n")
-        stdoutdata = subprocess.getoutput(command).splitlines()
+        logger.info("\n\nRUNNING COMMAND:\n\n%s\n\n", command)
+        start_time = time.time()
+        strix_counts["calls"] += 1
+        try:
+            stdoutdata = subprocess.check_output([command], shell=True, timeout=SYNTHESIS_TIMEOUT,
+                                                 encoding='UTF-8').splitlines()
+        except subprocess.TimeoutExpired:
+            logger.warning("TIMEOUT for realizability, more than %s sec", SYNTHESIS_TIMEOUT)
+            profiler.record("strix_realizability", time.time() - start_time, formula_size(formula))
+            return False, -100
+        exec_time = time.time() - start_time
+        profiler.record("strix_realizability", exec_time, formula_size(formula))
         if stdoutdata[0] == "REALIZABLE":
-            return True
+            strix_cache.put(key, {"realizable": True, "controller": None, "time": exec_time})
+            return True, exec_time
         if stdoutdata[0] == "UNREALIZABLE":
-            return False
+            strix_cache.put(key, {"realizable": False, "controller": None, "time": exec_time})
+            return False, exec_time
         else:
             raise Exception("Unknown strix response: " + stdoutdata[0])
     except Exception as e:
         raise e
 
 
+def is_realizable(assumptions: str, guarantees: str, ins: str, outs: str) -> bool:
+    realizable, _ = check_realizability(assumptions, guarantees, ins, outs)
+    return realizable
+
+
+def guarantees_unsatisfiable(assumptions: str, guarantees: str, ins: str, outs: str) -> bool:
+    """Pre-check without strix: if the assumptions only constrain the inputs, the environment can always satisfy
+    them (they are satisfiable), so the specification is unrealizable when the guarantees are not satisfiable"""
+    try:
+        if not atom_set(parse(assumptions)) <= set(x.strip() for x in ins.split(",")):
+            return False
+    except LTLSyntaxError:
+        return False
+    variables = [var.strip() + ": boolean" for var in (ins + "," + outs).split(",") if var.strip() != ""]
+    return not check_satisfiability(variables, guarantees)
+
+
 def get_controller(assumptions: str, guarantees: str, ins: str, outs: str) -> Tuple[str, float]:
+    """Returns the DOT controller or "UNREALIZABLE", and the time strix needed.
+    A specification already synthesized returns the stored result and time"""
     try:
-        print("Formatting TRUE as true for strix")
-        assumptions = assumptions.replace("TRUE", "true")
-        guarantees = guarantees.replace("TRUE", "true")
-        params = ' -k --dot -f "' + Implies(assumptions, guarantees) + '" --ins="' + ins + '" --outs="' + outs + '"'
+        formula = strix_formula(assumptions, guarantees)
+        key = synthesis_key(formula, ins, outs)
+        cached = strix_cache.get(key)
+        if cached is not None:
+            if not cached["realizable"]:
+                profiler.record("strix_cache", size=formula_size(formula))
+                strix_counts["cache_hits"] += 1
+                return "UNREALIZABLE", cached["time"]
+            if cached["controller"] is not None:
+                profiler.record("strix_cache", size=formula_size(formula))
+                strix_counts["cache_hits"] += 1
+                return cached["controller"], cached["time"]
+
+        params = ' -k --dot -f "' + formula + '" --ins="' + ins + '" --outs="' + outs + '"'
         command = strix_path + params
-        print("\n\nRUNNING COMMAND:\n\n" + command + "\n\n")
+        logger.info("\n\nRUNNING COMMAND:\n\n%s\n\n", command)
         start_time = time.time()
+        strix_counts["calls"] += 1
         result = []
         try:
-            result = subprocess.check_output([strix_path + params], shell=True, timeout=3600, encoding='UTF-8').split()
+            result = subprocess.check_output([strix_path + params], shell=True, timeout=SYNTHESIS_TIMEOUT,
+                                             encoding='UTF-8').split()
             # result = subprocess.check_output([strix_path + params], shell=True, encoding='UTF-8').split()
         except subprocess.TimeoutExpired as e:
-            print("TIMEOUT for synthesis, more than 100 sec")
+            logger.warning("TIMEOUT for synthesis, more than %s sec", SYNTHESIS_TIMEOUT)
+            profiler.record("strix_controller", time.time() - start_time, formula_size(formula))
             return "UNREALIZABLE", -100
         except Exception as e:
-            print("EXEPTION OCCURRED:\n" + str(e))
-            print("FINISH EXEPTION\n\n")
+            logger.error("EXEPTION OCCURRED:\n%s\nFINISH EXEPTION\n\n", e)
         exec_time = time.time() - start_time
+        profiler.record("strix_controller", exec_time, formula_size(formula))
         if result[0] == "REALIZABLE":
             dot_format = ""
             for i, line in enumerate(result):
@@ -77,23 +169,55 @@ def get_controller(assumptions: str, guarantees: str, ins: str, outs: str) -> Tu
                 else:
                     dot_format = "".join(result[i:])
                     break
+            strix_cache.put(key, {"realizable": True, "controller": dot_format, "time": exec_time})
             return dot_format, exec_time
         if result[0] == "UNREALIZABLE":
+            strix_cache.put(key, {"realizable": False, "controller": None, "time": exec_time})
             return "UNREALIZABLE", exec_time
         else:
-            print("\n\nSTRIX RESPONSE:\n\n")
-            for l in result:
-                print(l)
+            logger.error("\n\nSTRIX RESPONSE:\n\n%s", "\n".join(result))
             raise Exception("Unknown strix response: " + result[0])
     except Exception as e:
         raise e
 
 
+def save_synthesis_phases(controller_input_file: str, phases: List[Tuple[str, float]]):
+    """Writes the time of each phase of the synthesis in 'synthesis.txt', next to the specification"""
+    text = ""
+    for phase, exec_time in phases:
+        text += phase + "\t" + format(exec_time, '.3f') + "\n"
+    save_to_file(text, os.path.join(os.path.dirname(controller_input_file), "synthesis.txt"))
+
+
+def synthesis_phases(controller_input_file: str) -> List[Tuple[str, float]]:
+    """Phases of the last synthesis of the specification and their time, empty if it has not been synthesized"""
+    phases = []
+    phases_file = os.path.join(os.path.dirname(controller_input_file), "synthesis.txt")
+    if not os.path.exists(phases_file):
+        return phases
+    with open(phases_file) as f:
+        for line in f:
+            if line.strip() != "":
+                phase, exec_time = line.split("\t")
+                phases.append((phase, float(exec_time)))
+    return phases
+
+
+def pretty_print_synthesis_phases(controller_input_file: str) -> str:
+    ret = ""
+    for phase, exec_time in synthesis_phases(controller_input_file):
+        ret += "\t" + phase + "\t" + format(exec_time, '.3f') + "sec\n"
+    return ret
+
+
+@profiled("synthesis")
 def create_controller_if_exists(controller_input_file: str) -> Tuple[bool, float]:
     """Return true if controller has been synthesized False otherwise.
-    It also return the time needed"""
+    It also return the time needed.
+    The synthesis has two phases: the realizability check, and the construction of the controller only for the
+    realizable specifications. The unsatisfiable guarantees are detected before calling strix"""
     if platform.system() != "Linux":
-        print(platform.system() + " is not supported for synthesis")
+        logger.warning("%s is not supported for synthesis", platform.system())
         raise SynthesisException("os_not_supported")
 
     a, g, i, o = parse_controller(controller_input_file)
@@ -104,26 +228,46 @@ def create_controller_if_exists(controller_input_file: str) -> Tuple[bool, float
     if not assumptions_satisfiable:
         raise SynthesisException("trivial")
 
+    phases = []
+
+    if PRECHECK_GUARANTEES:
+        start_time = time.time()
+        unsatisfiable = guarantees_unsatisfiable(a, g, i, o)
+        phases.append(("PRECHECK", time.time() - start_time))
+        if unsatisfiable:
+            logger.info("UNREALIZABLE: the guarantees are not satisfiable")
+            save_synthesis_phases(controller_input_file, phases)
+            return False, phases[0][1]
+
+    realizable, realizability_time = check_realizability(a, g, i, o)
+    phases.append(("REALIZABILITY", realizability_time))
+    if not realizable:
+        logger.info("UNREALIZABLE")
+        save_synthesis_phases(controller_input_file, phases)
+        return False, realizability_time
+
     result, exec_time = get_controller(a, g, i, o)
+    phases.append(("CONTROLLER", exec_time))
+    save_synthesis_phases(controller_input_file, phases)
 
     if result.startswith("UNREALIZABLE"):
-        print("UNREALIZABLE")
+        logger.info("UNREALIZABLE")
         return False, exec_time
 
-    print(controller_input_file + " IS REALIZABLE")
+    logger.info("%s IS REALIZABLE", controller_input_file)
     dot_file_path = os.path.dirname(controller_input_file)
     dot_file_name = os.path.splitext(controller_input_file)[0]
 
     dot_file_name = dot_file_name.replace("specification", "controller")
 
     save_to_file(result, dot_file_name + ".dot")
-    print("DOT file generated")
+    logger.info("DOT file generated")
 
 
     src = Source(result, directory=dot_file_path, filename=dot_file_name, format="eps")
     src.render(cleanup=True)
-    print(dot_file_name + ".eps  ->   mealy machine generated")
-    return True, exec_time
+    logger.info("%s.eps  ->   mealy machine generated", dot_file_name)
+    return True, realizability_time + exec_time
 
 
 if __name__ == '__main__':
@@ -1,4 +1,3 @@
-from copy import deepcopy
 from typing import List
 
 from contracts.contract import Contract
@@ -7,8 +6,11 @@ from typescogomo.assumption import Expectation
 from typescogomo.formula import LTL
 from typescogomo.formulae import Guarantees
 from src.checks.tools import Or, And, Implies
+from helper.logger import get_logger
 from typescogomo.variables import Variables
 
+logger = get_logger(__name__)
+
 
 class CGTGoal:
     """Contract-based Goal Tree"""
@@ -54,7 +56,7 @@ class CGTGoal:
         if context is not None:
             self.set_context(context)
 
-        print(self)
+        logger.debug("%s", self)
 
 
     @property
@@ -187,6 +189,19 @@ class CGTGoal:
         self.__refined_with = "PROVIDED_BY"
         goal.connected_to = self
 
+    def copy(self) -> 'CGTGoal':
+        """Copy of the tree rooted in this goal, not connected to any other goal.
+        Unlike deepcopy, the parents are not copied and the formulas are shared"""
+        new = object.__new__(type(self))
+        new.__dict__.update(self.__dict__)
+        new.connected_to = None
+        new.contracts = [contract.copy() for contract in self.contracts]
+        new.goal_context_to_show = self.goal_context_to_show.copy()
+        new.goal_context = [context.copy() for context in self.goal_context]
+        if self.refined_by is not None:
+            new.refined_by = [goal.copy() for goal in self.refined_by]
+        return new
+
     def set_context(self, context: Context):
         """Add context to guarantees as G(context -> guarantee)"""
         for contract in self.contracts:
@@ -275,9 +290,9 @@ class CGTGoal:
                     substituted = True
 
         if substituted:
-            print("Substitution successful: " + goal_name + "with" + goal_name_update)
+            logger.info("Substitution successful: %s with %s", goal_name, goal_name_update)
         else:
-            print("No substitution has been performed")
+            logger.warning("No substitution has been performed")
 
     def abstract_guarantees_of(self, goal_name: str, guarantees: Guarantees, abstract_name: str = None):
 
@@ -293,7 +308,7 @@ class CGTGoal:
             refined_goal = CGTGoal()
             refined_goal.name = goal.name
             refined_goal.description = goal.description
-            refined_goal.contracts = deepcopy(goal.contracts)
+            refined_goal.contracts = [contract.copy() for contract in goal.contracts]
             refined_goal.refined_by = goal.refined_by
             refined_goal.refined_with = goal.refined_with
 
@@ -303,7 +318,7 @@ class CGTGoal:
 
             goal.refine_by([refined_goal])
 
-        print("Abstraction of " + goal_name + " completed")
+        logger.info("Abstraction of %s completed", goal_name)
 
     def consolidate_bottom_up(self):
         """It recursivly re-perfom composition and conjunction and refinement operations up to the rood node"""
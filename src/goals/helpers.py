@@ -1,8 +1,14 @@
 import itertools
+import logging
 import re
-from copy import deepcopy
 from typing import Union, Dict, List, Tuple
+from checks.bdd import canonical_form
+from checks.nusmv import check_many, SATISFIABILITY
+from checks.propositional import check_propositional
+from checks.syntax import Node, Operator, is_temporal
 from checks.tools import Not, Or, And, Implies
+from helper.logger import get_logger
+from helper.profiling import profiled
 from helper.tools import traslate_boolean
 from typescogomo.assumption import Context
 from typescogomo.formulae import LTLs, Assumptions
@@ -10,6 +16,8 @@ from typescogomo.formula import LTL, InconsistentException
 from typescogomo.variables import Type, Variables
 from goals.cgtgoal import CGTGoal
 
+logger = get_logger(__name__)
+
 
 def context_based_specification_clustering(combinations: List[List[Context]],
                                            rules: List[LTL],
@@ -22,16 +30,17 @@ def context_based_specification_clustering(combinations: List[List[Context]],
     if rules is not None:
         add_constraints_to_all_contexts(combinations, rules, add_to_all=True)
 
-    print("\n\n__ALL_COMBINATIONS_(" + str(
-        len(combinations)) + ")___________________________________________________________")
+    logger.debug("\n\n__ALL_COMBINATIONS_(%d)___________________________________________________________",
+                 len(combinations))
     for c_list in combinations:
-        print(*c_list, sep='\t\t\t')
+        logger.debug("%s", "\t\t\t".join(str(c) for c in c_list))
 
     """Filter from combinations the comb that are satisfiable and if they are then simplify and merge them"""
     merged, merged_simplified = merge_contexes(combinations, KEEP_SMALLER_COMBINATION)
 
-    print("\n\n__MERGED_____________________________________________________________________")
-    print(*merged, sep='\n')
+    logger.debug("\n\n__MERGED_____________________________________________________________________")
+    for c in merged:
+        logger.debug("%s", c)
 
     # print("\n\n__MERGED_AND_GROUPED_________________________________________________________")
     # print(*merged_simplified, sep='\n')
@@ -59,14 +68,15 @@ def find_goal_with_name(name: str, goals: Union[Dict[CGTGoal, List[CGTGoal]], Li
                 return goal
 
 
+@profiled("filter_and_simplify_contexts")
 def filter_and_simplify_contexts(contexts: List[List[Context]], KEEP_SMALLER_CONTEXT) -> List[List[Context]]:
     new_list: List[List[Context]] = []
-    print("\n\nFILTERING " + str(len(contexts)) + " CONTEXTS...")
+    logger.info("\n\nFILTERING %d CONTEXTS...", len(contexts))
 
     for c_list in contexts:
         """Extract formulas and check satisfiability"""
         try:
-            LTLs(c_list)
+            LTLs(c_list).validate()
         except InconsistentException:
             continue
 
@@ -82,16 +92,16 @@ def filter_and_simplify_contexts(contexts: List[List[Context]], KEEP_SMALLER_CON
                     if (ca is not cb) and \
                             cb.formula in [n.formula for n in new_comb]:
                         if ca <= cb:
-                            print(str(ca) + "\nINCLUDED IN\n" + str(cb))
+                            logger.debug("%s\nINCLUDED IN\n%s", ca, cb)
                             new_comb.remove(cb)
-                            print(str(cb) + "\nREMOVED (kept smaller)")
+                            logger.debug("%s\nREMOVED (kept smaller)", cb)
                 else:
                     if (ca is not cb) and \
                             ca in new_comb:
                         if ca <= cb:
-                            print(str(ca) + "\nINCLUDED IN\n" + str(cb))
+                            logger.debug("%s\nINCLUDED IN\n%s", ca, cb)
                             new_comb.remove(ca)
-                            print(str(ca) + "\nREMOVED (kept bigger)")
+                            logger.debug("%s\nREMOVED (kept bigger)", ca)
 
         new_list.append(new_comb)
 
@@ -114,10 +124,10 @@ def extract_ltl_rules(context_rules: Dict) -> List[LTL]:
                 clauses = []
                 for vs_a in cvars_str:
                     clause = []
-                    clause.append(deepcopy(vs_a))
+                    clause.append(vs_a)
                     for vs_b in cvars_str:
                         if vs_a is not vs_b:
-                            clause.append(Not(deepcopy(vs_b)))
+                            clause.append(Not(vs_b))
                     clauses.append(And(clause))
 
                 ltl += Or(clauses)
@@ -223,7 +233,7 @@ def extract_all_combinations_and_negations_from_contexts(contexts: List[Context]
 
             for ctx in contexts:
                 if ctx.formula not in [n.formula for n in comb_contexts_neg]:
-                    ctx_copy = deepcopy(ctx)
+                    ctx_copy = ctx.copy()
                     ctx_copy.negate()
                     comb_contexts_neg.append(ctx_copy)
 
@@ -233,17 +243,96 @@ def extract_all_combinations_and_negations_from_contexts(contexts: List[Context]
     return combs_all_contexts, combs_all_contexts_neg
 
 
+@profiled("extract_consistent_combinations")
+def extract_consistent_combinations_from_contexts(contexts: List[Context],
+                                                  rules: List[LTL],
+                                                  negations: bool) -> List[List[Context]]:
+    """Same combinations of extract_all_combinations_and_negations_from_contexts, without the ones that are
+    inconsistent with the invariants of the rules (mutex and inclusion rules are 'G(invariant)').
+    The combinations are built by backtracking over the contexts: a branch is pruned as soon as the contexts chosen
+    so far are inconsistent, so none of the combinations extending it is generated.
+    The pruning is decided in-process, when it cannot (temporal contexts or no z3) all combinations are kept
+    and their satisfiability is checked later by merge_contexes"""
+
+    negated: List[Context] = []
+    if negations:
+        for ctx in contexts:
+            ctx_copy = ctx.copy()
+            ctx_copy.negate()
+            negated.append(ctx_copy)
+
+    invariants: List[Node] = []
+    variables = Variables()
+    for ctx in contexts:
+        variables.extend(ctx.variables)
+    for rule in rules:
+        if rule.tree.op == "G" and not is_temporal(rule.tree.args[0]):
+            invariants.append(rule.tree.args[0])
+            variables.extend(rule.variables)
+    nusmv_variables = variables.get_nusmv_names()
+
+    def consistent(literals: List[Node]) -> bool:
+        if len(literals) == 0:
+            return True
+        conjunction = Operator("&", *literals, *invariants)
+        """None if it cannot be decided in-process"""
+        return check_propositional(nusmv_variables, str(Node("!", conjunction))) is not True
+
+    selected: List[Tuple[int, ...]] = []
+
+    def search(i: int, literals: List[Node], chosen: List[int], changed: bool):
+        if changed and not consistent(literals):
+            return
+        if i == len(contexts):
+            if len(chosen) > 0:
+                selected.append(tuple(chosen))
+            return
+        search(i + 1, literals + [contexts[i].tree], chosen + [i], True)
+        if negations:
+            search(i + 1, literals + [negated[i].tree], chosen, True)
+        else:
+            search(i + 1, literals, chosen, False)
+
+    search(0, [], [], False)
+
+    logger.info("\n\n%d CONSISTENT COMBINATIONS OUT OF %d", len(selected), 2 ** len(contexts) - 1)
+
+    """Same order of extract_all_combinations_and_negations_from_contexts"""
+    selected.sort(key=lambda comb: (len(comb), comb))
+
+    combinations: List[List[Context]] = []
+    for comb in selected:
+        comb_contexts = [contexts[i] for i in comb]
+        if negations:
+            comb_contexts.extend(negated[i] for i in range(len(contexts)) if i not in comb)
+        combinations.append(comb_contexts)
+
+    return combinations
+
+
+@profiled("merge_contexes")
 def merge_contexes(contexts: List[List[Context]], KEEP_SMALLER_COMBINATION) -> Tuple[List[Context], List[Context]]:
     """Merge the consistent contexts with conjunction"""
     contexts_merged: List[Context] = []
 
-    print("\n\nMERGING " + str(len(contexts)) + " CONTEXTS...")
+    logger.info("\n\nMERGING %d CONTEXTS...", len(contexts))
+
+    groups = [group for group in contexts if len(group) > 0]
+
+    """Check the satisfiability of all the groups concurrently"""
+    queries = []
+    for group in groups:
+        variables = Variables()
+        for ctx in group:
+            variables.extend(ctx.variables)
+        queries.append((SATISFIABILITY, variables.get_nusmv_names(), [ctx.formula for ctx in group]))
+    satisfiable = check_many(queries)
 
-    for group in contexts:
-        if len(group) > 0:
+    for group, group_satisfiable in zip(groups, satisfiable):
+        if group_satisfiable:
             """Extract formulas and check satisfiability, it also filters and simplify each context"""
             try:
-                conj = LTLs(group, simplify=False)
+                conj = LTLs(group, simplify=False).validate()
             except InconsistentException:
                 continue
             new_ctx = Context()
@@ -269,9 +358,9 @@ def merge_contexes(contexts: List[List[Context]], KEEP_SMALLER_COMBINATION) -> T
                 if (ca is not cb) and \
                         cb in context_merged_simplified:
                     if ca <= cb:
-                        print(str(ca) + "\nINCLUDED IN\n" + str(cb))
+                        logger.debug("%s\nINCLUDED IN\n%s", ca, cb)
                         context_merged_simplified.remove(cb)
-                        print(str(cb) + "\nREMOVED (kept smaller)")
+                        logger.debug("%s\nREMOVED (kept smaller)", cb)
                     else:
                         if ca.is_satisfiable_with(cb):
                             mutex = False
@@ -279,112 +368,119 @@ def merge_contexes(contexts: List[List[Context]], KEEP_SMALLER_COMBINATION) -> T
                 if (ca is not cb) and \
                         ca in context_merged_simplified:
                     if ca <= cb:
-                        print(str(ca) + "\nINCLUDED IN\n" + str(cb))
+                        logger.debug("%s\nINCLUDED IN\n%s", ca, cb)
                         context_merged_simplified.remove(ca)
-                        print(str(ca) + "\nREMOVED (kept bigger)")
+                        logger.debug("%s\nREMOVED (kept bigger)", ca)
                     else:
                         if ca.is_satisfiable_with(cb):
                             mutex = False
 
     if mutex:
-        print("****  All contexts are mutually exclusive  ****")
+        logger.info("****  All contexts are mutually exclusive  ****")
     else:
-        print("**** Contexts are NOT mutually exclusive  ****")
+        logger.info("**** Contexts are NOT mutually exclusive  ****")
 
     return contexts_merged, context_merged_simplified
 
 
+@profiled("map_goals_to_contexts")
 def map_goals_to_contexts(contexts: List[Context], goals: List[CGTGoal], GOAL_CTX_SAT, GOAL_CTX_SMALLER,
                           SAVE_SMALLER_CONTEXT) -> Dict[Context, List[CGTGoal]]:
-    """Map each goal to each context """
+    """Map each goal to each context.
+    The goals are grouped by their context, so that each distinct goal context is checked once against each context"""
 
-    goals_non_mapped = list(goals)
-    print("\n\nMAPPING " + str(len(goals)) + " GOALS TO " + str(len(contexts)) + " CONTEXTS")
+    logger.info("\n\nMAPPING %d GOALS TO %d CONTEXTS", len(goals), len(contexts))
+
+    """Goals with equivalent contexts are in the same group, None is the group of the goals without context"""
+    goal_keys = []
+    goal_groups: Dict = {}
+    goal_group_ctx: Dict = {}
+    for goal in goals:
+        if goal.context is None:
+            key = None
+        else:
+            goal_ctx = goal.context[0]
+            key = canonical_form(goal_ctx.tree)
+            if key is None:
+                key = goal_ctx.tree
+            goal_group_ctx.setdefault(key, goal_ctx)
+        goal_keys.append(key)
+        goal_groups.setdefault(key, []).append(goal)
+
+    goals_mapped = set()
     context_goals: Dict[Context, List[CGTGoal]] = {}
     for ctx in contexts:
-        for goal in goals:
-            """If the goal has no context"""
-            if goal.context is None:
-                """Add goal to the context"""
-                if ctx in context_goals:
-                    if goal not in context_goals[ctx]:
-                        context_goals[ctx].append(goal)
-                else:
-                    context_goals[ctx] = [goal]
-                if goal in goals_non_mapped:
-                    goals_non_mapped.remove(goal)
-            else:
-                goal_ctxs = goal.context
-                goal_ctx = goal_ctxs[0]
-                if GOAL_CTX_SAT:
-                    """Verify that the goal-context is satisfiable with the context"""
-                    if goal_ctx.is_satisfiable_with(ctx):
-                        print("Goal_ctx (" + goal.name + "): " + str(goal_ctx) + " \t-->\t Ctx: " + str(ctx))
-                        """Add goal to the context"""
-                        if ctx in context_goals:
-                            if goal not in context_goals[ctx]:
-                                context_goals[ctx].append(goal)
-                        else:
-                            context_goals[ctx] = [goal]
-                        if goal in goals_non_mapped:
-                            goals_non_mapped.remove(goal)
-                else:
-                    if GOAL_CTX_SMALLER:
-                        """Verify that the goal is included the context"""
-                        if goal_ctx <= ctx:
-                            print("Goal_ctx: " + str(goal_ctx) + " \t-->\t Ctx: " + str(ctx))
-                            """Add goal to the context"""
-                            if ctx in context_goals:
-                                if goal not in context_goals[ctx]:
-                                    context_goals[ctx].append(goal)
-                            else:
-                                context_goals[ctx] = [goal]
-                            if goal in goals_non_mapped:
-                                goals_non_mapped.remove(goal)
-                    else:
-                        """Verify that the context is included in goal context"""
-                        if ctx <= goal_ctx:
-                            print("Ctx: " + str(ctx) + " \t-->\t Goal_ctx: " + str(goal_ctx))
-                            """Add goal to the context"""
-                            if ctx in context_goals:
-                                if goal not in context_goals[ctx]:
-                                    context_goals[ctx].append(goal)
-                            else:
-                                context_goals[ctx] = [goal]
-                            if goal in goals_non_mapped:
-                                goals_non_mapped.remove(goal)
-
-    """Check all the contexts that point to the same set of goals and take the most abstract one"""
-    ctx_removed = []
-    context_goals_copy = dict(context_goals)
-    for ctxa, goalsa in context_goals_copy.items():
-
-        for ctxb, goalsb in context_goals_copy.items():
-            if ctxa.formula in ctx_removed:
-                continue
-            if ctxb.formula in ctx_removed:
+        mapped_groups = []
+        for key, group in goal_groups.items():
+            if key is None:
+                """If the goal has no context"""
+                mapped_groups.append(key)
                 continue
-            if ctxa is not ctxb:
-                if set(goalsa) == set(goalsb):
+            goal_ctx = goal_group_ctx[key]
+            if GOAL_CTX_SAT:
+                """Verify that the goal-context is satisfiable with the context"""
+                if goal_ctx.is_satisfiable_with(ctx):
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("Goal_ctx (%s): %s \t-->\t Ctx: %s",
+                                     ", ".join(g.name for g in group), goal_ctx, ctx)
+                    mapped_groups.append(key)
+            elif GOAL_CTX_SMALLER:
+                """Verify that the goal is included the context"""
+                if goal_ctx <= ctx:
+                    logger.debug("Goal_ctx: %s \t-->\t Ctx: %s", goal_ctx, ctx)
+                    mapped_groups.append(key)
+            else:
+                """Verify that the context is included in goal context"""
+                if ctx <= goal_ctx:
+                    logger.debug("Ctx: %s \t-->\t Goal_ctx: %s", ctx, goal_ctx)
+                    mapped_groups.append(key)
+
+        if len(mapped_groups) == 0:
+            continue
+        mapped_groups = set(mapped_groups)
+
+        """Add the goals to the context, in the order of 'goals'"""
+        ctx_goals = context_goals.setdefault(ctx, [])
+        for goal, key in zip(goals, goal_keys):
+            if key in mapped_groups and goal not in ctx_goals:
+                ctx_goals.append(goal)
+                goals_mapped.add(goal)
+
+    """Check all the contexts that point to the same set of goals and take the most abstract one.
+    Only the contexts with the same set of goals are compared"""
+    buckets: Dict[frozenset, List[Context]] = {}
+    for ctx, ctx_goals in context_goals.items():
+        buckets.setdefault(frozenset(ctx_goals), []).append(ctx)
+
+    for bucket in buckets.values():
+        ctx_removed = set()
+        for ctxa in bucket:
+            for ctxb in bucket:
+                if id(ctxa) in ctx_removed:
+                    continue
+                if id(ctxb) in ctx_removed:
+                    continue
+                if ctxa is not ctxb:
                     if ctxa <= ctxb:
-                        print(str(ctxa) + "\nINCLUDED IN\n" + str(ctxb))
+                        logger.debug("%s\nINCLUDED IN\n%s", ctxa, ctxb)
                         if SAVE_SMALLER_CONTEXT:
                             del context_goals[ctxb]
-                            ctx_removed.append(ctxb.formula)
-                            print(str(ctxb) + "\nREMOVED")
+                            ctx_removed.add(id(ctxb))
+                            logger.debug("%s\nREMOVED", ctxb)
                         else:
                             del context_goals[ctxa]
-                            ctx_removed.append(ctxa.formula)
-                            print(str(ctxa) + "\nREMOVED")
+                            ctx_removed.add(id(ctxa))
+                            logger.debug("%s\nREMOVED", ctxa)
 
     """Check the all the goals have been mapped"""
+    goals_non_mapped = [goal for goal in goals if goal not in goals_mapped]
     if len(goals_non_mapped) > 0:
-        print("+++++CAREFUL+++++++")
+        logger.warning("+++++CAREFUL+++++++")
         for g in goals_non_mapped:
-            print(g.name + ": " + str(g.context) + " not mapped to any goal")
+            logger.warning("%s: %s not mapped to any goal", g.name, g.context)
         raise Exception("Some goals have not been mapped to the context!")
 
-    print("*** ALL GOAL HAVE BEEN MAPPED TO A CONTEXT ***")
+    logger.info("*** ALL GOAL HAVE BEEN MAPPED TO A CONTEXT ***")
 
     return context_goals
 
@@ -1,7 +1,10 @@
-from copy import deepcopy
+import logging
 from itertools import product, combinations
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 from components.components import ComponentsLibrary
+from helper.parallel import run_parallel
+from helper.logger import get_logger
+from helper.profiling import profiled
 from src.contracts.contract import Contract, InconsistentContracts, IncompatibleContracts, UnfeasibleContracts
 from src.contracts.operations import compose_contracts
 from src.goals.cgtgoal import CGTGoal
@@ -9,9 +12,11 @@ from typescogomo.assumption import Context
 from typescogomo.formula import InconsistentException
 from typescogomo.formulae import Guarantees, Assumptions
 from src.goals.helpers import extract_ltl_rules, map_goals_to_contexts, filter_and_simplify_contexts, \
-    extract_unique_contexts_from_goals, extract_all_combinations_and_negations_from_contexts, \
+    extract_unique_contexts_from_goals, extract_consistent_combinations_from_contexts, \
     add_constraints_to_all_contexts, merge_contexes, context_based_specification_clustering
 
+logger = get_logger(__name__)
+
 
 class CGTFailException(Exception):
     def __init__(self, failed_operation: "str", faild_motivation: "str", goals_involved_a: List[CGTGoal],
@@ -22,6 +27,19 @@ class CGTFailException(Exception):
         self.goals_involved_b = goals_involved_b
 
 
+class CGTTimeoutException(Exception):
+    def __init__(self, timed_out: List[Tuple[Context, List[CGTGoal]]]):
+        """'timed_out': (context, goals) of the clusters whose composition timed out"""
+        self.timed_out = timed_out
+        super().__init__("The composition of " + str(len(timed_out)) + " clusters timed out: " +
+                         str([[g.name for g in goals] for _, goals in timed_out]))
+
+
+"""Result of the clusters whose composition timed out in 'create_cgt'"""
+CLUSTER_TIMEOUT = "timeout"
+
+
+@profiled("conjunction")
 def conjunction(goals: List[CGTGoal],
                 name: str = None,
                 description: str = None,
@@ -33,8 +51,8 @@ def conjunction(goals: List[CGTGoal],
     for n, goal in enumerate(goals):
         if goal.connected_to is not None and connect_to is not None:
             if connect_to != goal.connected_to:
-                print(goal.name + " is already part of another CGT. Making a copy of it...")
-                goals[n] = deepcopy(goal)
+                logger.info("%s is already part of another CGT. Making a copy of it...", goal.name)
+                goals[n] = goal.copy()
                 goals[n].name = goals[n].name
 
     if name is None:
@@ -65,10 +83,10 @@ def conjunction(goals: List[CGTGoal],
                     guarantees_set.extend(contract_2.guarantees.list)
 
                     try:
-                        Assumptions(assumptions_set)
+                        Assumptions(assumptions_set).validate()
 
                         try:
-                            Guarantees(guarantees_set)
+                            Guarantees(guarantees_set).validate()
                         except InconsistentException:
                             raise CGTFailException(failed_operation="conjunction",
                                                    faild_motivation="inconsistent",
@@ -78,7 +96,7 @@ def conjunction(goals: List[CGTGoal],
                         """If the assumptions are mutually exclusive it's ok"""
                         pass
 
-    print("The conjunction satisfiable.")
+    logger.info("The conjunction satisfiable.")
 
     # Creating new list of contracts
     list_of_new_contracts = []
@@ -86,7 +104,7 @@ def conjunction(goals: List[CGTGoal],
     for goal in goals:
         contracts = goal.contracts
         for contract in contracts:
-            new_contract = deepcopy(contract)
+            new_contract = contract.copy()
             list_of_new_contracts.append(new_contract)
 
     conjoined_goal = CGTGoal(name=name,
@@ -103,6 +121,7 @@ def conjunction(goals: List[CGTGoal],
         connect_to.update_with(conjoined_goal, consolidate=False)
 
 
+@profiled("composition")
 def composition(goals: List[CGTGoal],
                 name: str = None,
                 description: str = None,
@@ -113,8 +132,8 @@ def composition(goals: List[CGTGoal],
     for n, goal in enumerate(goals):
         if goal.connected_to is not None and connect_to is not None:
             if connect_to != goal.connected_to:
-                print(goal.name + " is already part of another CGT. Making a copy of it...")
-                goals[n] = deepcopy(goal)
+                logger.info("%s is already part of another CGT. Making a copy of it...", goal.name)
+                goals[n] = goal.copy()
                 goals[n].name = goals[n].name
 
     contracts: Dict[CGTGoal, List[Contract]] = {}
@@ -204,6 +223,7 @@ def composition(goals: List[CGTGoal],
         connect_to.update_with(composed_goal, consolidate=False)
 
 
+@profiled("mapping")
 def mapping(component_library: ComponentsLibrary,
             specification_goal: CGTGoal,
             name: str = None,
@@ -290,6 +310,7 @@ def mapping(component_library: ComponentsLibrary,
     specification_goal.refine_by([composition_goal])
 
 
+@profiled("create_contextual_clusters")
 def create_contextual_clusters(goals: List[CGTGoal], type: str, context_rules: Dict = None) -> Dict:
     """Returns all combinations that are consistent"""
 
@@ -332,16 +353,14 @@ def create_contextual_clusters(goals: List[CGTGoal], type: str, context_rules: D
     """Extract all unique contexts"""
     contexts: List[Context] = extract_unique_contexts_from_goals(goals)
 
-    print("\n\n\n\n" + str(len(goals)) + " GOALS\nCONTEXTS:" + str([str(c) for c in contexts]))
-
-    print("\n\n")
-
-    """Extract the combinations of all contextes and the combination with the negations of all the other contexts"""
-    combs_all_contexts, combs_all_contexts_neg = extract_all_combinations_and_negations_from_contexts(contexts)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("\n\n\n\n%d GOALS\nCONTEXTS:%s\n\n", len(goals), [str(c) for c in contexts])
 
     context_goals = {}
 
     if type == "MINIMAL":
+        """Extract the consistent combinations of all contextes"""
+        combs_all_contexts = extract_consistent_combinations_from_contexts(contexts, ltl_rules, negations=False)
         context_goals = context_based_specification_clustering(combs_all_contexts, ltl_rules, goals,
                                                                KEEP_SMALLER_COMBINATION,
                                                                GOAL_CTX_SAT,
@@ -349,6 +368,8 @@ def create_contextual_clusters(goals: List[CGTGoal], type: str, context_rules: D
                                                                SAVE_SMALLER_CONTEXT)
 
     if type == "MUTEX":
+        """Extract the consistent combinations of all contextes with the negations of all the other contexts"""
+        combs_all_contexts_neg = extract_consistent_combinations_from_contexts(contexts, ltl_rules, negations=True)
         context_goals = context_based_specification_clustering(combs_all_contexts_neg, ltl_rules, goals,
                                                                KEEP_SMALLER_COMBINATION,
                                                                GOAL_CTX_SAT,
@@ -358,27 +379,51 @@ def create_contextual_clusters(goals: List[CGTGoal], type: str, context_rules: D
     return context_goals
 
 
-def create_cgt(context_goals: Dict, compose_with_context: True) -> CGTGoal:
-    """Compose all the set of goals in identified context"""
+@profiled("compose_cluster")
+def compose_cluster(goals: List[CGTGoal]) -> Optional[CGTGoal]:
+    """Composition of a copy of the goals of a cluster, None if they cannot be composed"""
+    new_goals = [goal.copy() for goal in goals]
+    # if compose_with_context:
+    #     # Creating new context goal so its composition refined the assumptions:
+    #     ctx_goal = CGTGoal(
+    #         name="ctx_" + str(i),
+    #         contracts=[Contract(assumptions=Assumptions(ctx))])
+    #     new_goals.append(ctx_goal)
+    try:
+        return composition(new_goals)
+    except CGTFailException as e:
+        logger.warning("FAILED OPE:\t%s", e.failed_operation)
+        logger.warning("FAILED MOT:\t%s", e.faild_motivation)
+        logger.warning("GOALS_1:\t%s", [g.name for g in e.goals_involved_a])
+        logger.warning("GOALS_2:\t%s", [g.name for g in e.goals_involved_b])
+        return None
+
+
+def create_cgt(context_goals: Dict, compose_with_context: True, workers: int = 1,
+               timed_out: List[Tuple[Context, List[CGTGoal]]] = None) -> CGTGoal:
+    """Compose all the set of goals in identified context.
+    The clusters are independent, with more than one worker they are composed in parallel processes.
+    The clusters that cannot be composed are left out of the CGT. If the composition of some clusters times out,
+    their (context, goals) are added to 'timed_out', or CGTTimeoutException is raised if it is None"""
     composed_goals = []
-    for i, (ctx, goals) in enumerate(context_goals.items()):
-        new_goals = deepcopy(goals)
-        # if compose_with_context:
-        #     # Creating new context goal so its composition refined the assumptions:
-        #     ctx_goal = CGTGoal(
-        #         name="ctx_" + str(i),
-        #         contracts=[Contract(assumptions=Assumptions(ctx))])
-        #     new_goals.append(ctx_goal)
-        try:
-            ctx_goals = composition(new_goals)
+    contexts = list(context_goals.keys())
+    compositions = run_parallel(compose_cluster, [context_goals[ctx] for ctx in contexts], workers,
+                                default=CLUSTER_TIMEOUT)
+
+    timed_out_clusters = [(ctx, context_goals[ctx])
+                          for ctx, ctx_goals in zip(contexts, compositions) if ctx_goals is CLUSTER_TIMEOUT]
+    if len(timed_out_clusters) > 0:
+        if timed_out is None:
+            raise CGTTimeoutException(timed_out_clusters)
+        for ctx, goals in timed_out_clusters:
+            logger.warning("TIMEOUT composing the cluster %s in the context %s", [g.name for g in goals], ctx)
+        timed_out.extend(timed_out_clusters)
+
+    for ctx, ctx_goals in zip(contexts, compositions):
+        if ctx_goals is not None and ctx_goals is not CLUSTER_TIMEOUT:
             ctx_goals.goal_context_to_show = ctx
             # ctx_goals.context = ctx
             composed_goals.append(ctx_goals)
-        except CGTFailException as e:
-            print("FAILED OPE:\t" + e.failed_operation)
-            print("FAILED MOT:\t" + e.failed_operation)
-            print("GOALS_1:\t" + str([g.name for g in e.goals_involved_a]))
-            print("GOALS_2:\t" + str([g.name for g in e.goals_involved_a]))
 
     """Conjoin the goals across all the mutually exclusive contexts"""
     cgt = conjunction(composed_goals, check_consistency=False)
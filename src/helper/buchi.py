@@ -4,6 +4,9 @@ import platform
 
 from graphviz import Source
 
+from checks.syntax import formula_size
+from helper.logger import get_logger
+from helper.profiling import profiler, profiled
 from helper.tools import traslate_boolean, save_to_file
 from typescogomo.formula import AndLTL, NotLTL, ImpliesLTL
 from typescogomo.patterns import *
@@ -12,7 +15,10 @@ from typescogomo.variables import Boolean
 
 results_folder = results_path = os.path.dirname(os.path.abspath(__file__)) + "/output/"
 
+logger = get_logger(__name__)
 
+
+@profiled("buchi")
 def generate_buchi(formula: LTL, file_path: str):
     # if platform.system() != "Linux":
     #     print(platform.system() + " is not supported for buchi generation")
@@ -23,11 +29,12 @@ def generate_buchi(formula: LTL, file_path: str):
         if dot_file_path == "":
             file_path = results_folder + file_path
 
-        print(formula)
+        logger.debug("%s", formula)
         b_formula, new_vars, old_vars = traslate_boolean(formula.formula)
-        print(b_formula)
-        result = subprocess.check_output(["ltl2tgba", "-B", b_formula, "-d"], encoding='UTF-8',
-                                         stderr=subprocess.DEVNULL).splitlines()
+        logger.debug("%s", b_formula)
+        with profiler.timed("ltl2tgba", formula_size(b_formula)):
+            result = subprocess.check_output(["ltl2tgba", "-B", b_formula, "-d"], encoding='UTF-8',
+                                             stderr=subprocess.DEVNULL).splitlines()
         result = [x for x in result if not ('[Büchi]' in x)]
         result = "".join(result)
 
@@ -37,7 +44,7 @@ def generate_buchi(formula: LTL, file_path: str):
         save_to_file(result, dot_file_name + ".dot")
         src = Source(result, directory=dot_file_path, filename=dot_file_name, format="eps")
         src.render(cleanup=True)
-        print(dot_file_name + ".eps  ->   buchi generated")
+        logger.info("%s.eps  ->   buchi generated", dot_file_name)
 
     except Exception as e:
         raise e
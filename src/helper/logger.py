@@ -0,0 +1,30 @@
+import logging
+import os
+import sys
+
+"""Logging of CoGoMo. The messages are formatted only when their level is enabled, so the arguments must be passed
+separately, e.g. logger.debug("SAT: %s", formula), and expensive arguments must be guarded by
+logger.isEnabledFor(logging.DEBUG).
+    DEBUG       every check, inclusion, candidate and contract
+    INFO        the progress of the operations
+    WARNING     the problems that do not stop the run (default)
+Set COGOMO_LOG_LEVEL to change the level"""
+
+LOG_LEVEL = os.environ.get("COGOMO_LOG_LEVEL", "WARNING").upper()
+
+_root = logging.getLogger("cogomo")
+_root.setLevel(LOG_LEVEL)
+_root.propagate = False
+if len(_root.handlers) == 0:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    _root.addHandler(_handler)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger of the module 'name', child of the 'cogomo' logger"""
+    return logging.getLogger("cogomo." + name)
+
+
+def set_level(level: str):
+    _root.setLevel(level.upper())
@@ -0,0 +1,107 @@
+import multiprocessing
+import multiprocessing.connection
+import os
+import time
+import traceback
+from typing import Any, Callable, List
+
+from helper.logger import get_logger
+from helper.profiling import profiler
+
+"""Number of jobs run concurrently by run_parallel, set COGOMO_WORKERS to change it"""
+N_WORKERS = int(os.environ["COGOMO_WORKERS"]) if "COGOMO_WORKERS" in os.environ else (os.cpu_count() or 1)
+
+"""Seconds after which a job is terminated, set COGOMO_JOB_TIMEOUT to change it (no timeout by default)"""
+JOB_TIMEOUT = float(os.environ["COGOMO_JOB_TIMEOUT"]) if "COGOMO_JOB_TIMEOUT" in os.environ else None
+
+logger = get_logger(__name__)
+
+
+class JobFailed(Exception):
+    pass
+
+
+def _run_job(function: Callable, job: Any, connection):
+    """The process starts with a copy of the stats of the parent, only the stats of the job are sent back"""
+    profiler.clear()
+    try:
+        result = (True, function(job), profiler.stats)
+    except BaseException:
+        result = (False, traceback.format_exc(), profiler.stats)
+    try:
+        connection.send(result)
+    except Exception:
+        connection.send((False, traceback.format_exc(), profiler.stats))
+    finally:
+        connection.close()
+
+
+def run_parallel(function: Callable, jobs: List, workers: int = None, timeout: float = None,
+                 default: Any = None, callback: Callable[[int, Any], None] = None) -> List:
+    """Runs 'function(job)' for each job in its own process, at most 'workers' at a time, and returns the results
+    in the order of 'jobs'. A job running for more than 'timeout' seconds is terminated and its result is 'default'.
+    'callback(i, result)' is called in this process as soon as the i-th job is finished.
+    'function' must be defined at the top level of a module and the jobs and results must be picklable.
+    With one worker the jobs are run in this process, without timeout"""
+    if workers is None:
+        workers = N_WORKERS
+    if timeout is None:
+        timeout = JOB_TIMEOUT
+
+    if workers <= 1 or len(jobs) == 0:
+        results = []
+        for i, job in enumerate(jobs):
+            results.append(function(job))
+            if callback is not None:
+                callback(i, results[-1])
+        return results
+
+    results = [default] * len(jobs)
+    pending = list(reversed(list(enumerate(jobs))))
+    running = {}
+
+    try:
+        while len(pending) > 0 or len(running) > 0:
+            while len(pending) > 0 and len(running) < workers:
+                i, job = pending.pop()
+                receiver, sender = multiprocessing.Pipe(duplex=False)
+                process = multiprocessing.Process(target=_run_job, args=(function, job, sender))
+                process.start()
+                sender.close()
+                deadline = time.time() + timeout if timeout is not None else None
+                running[i] = (process, receiver, deadline)
+
+            ready = multiprocessing.connection.wait([receiver for _, receiver, _ in running.values()], timeout=1)
+
+            for i, (process, receiver, deadline) in list(running.items()):
+                if receiver in ready:
+                    try:
+                        succeeded, value, stats = receiver.recv()
+                        profiler.merge(stats)
+                    except EOFError:
+                        succeeded, value = False, "The process of the job terminated with code " + str(process.exitcode)
+                    receiver.close()
+                    process.join()
+                    del running[i]
+                    if not succeeded:
+                        raise JobFailed("Job " + str(i) + " failed:\n" + value)
+                    results[i] = value
+                    if callback is not None:
+                        callback(i, value)
+
+                elif deadline is not None and time.time() > deadline:
+                    logger.warning("TIMEOUT for job %d, more than %s sec", i, timeout)
+                    process.terminate()
+                    process.join()
+                    receiver.close()
+                    del running[i]
+                    if callback is not None:
+                        callback(i, default)
+
+    finally:
+        for process, receiver, _ in running.values():
+            process.terminate()
+            process.join()
+            receiver.close()
+
+    return results
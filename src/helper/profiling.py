@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, List, Tuple
+
+"""Counters and timers of the calls to nuXmv, strix and ltl2tgba and of the checks decided without them
+(simplification, BDDs, z3, caches). Every call is attributed to the innermost operation running in its thread,
+the operations are the functions decorated with 'profiled'"""
+
+"""Set COGOMO_PROFILE=0 to disable the counters"""
+PROFILE = os.environ.get("COGOMO_PROFILE", "1") != "0"
+
+"""Operation of the calls made outside of any profiled function"""
+NO_OPERATION = "-"
+
+
+class Profiler:
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__local = threading.local()
+
+        """(operation, tool) -> [calls, seconds, total size of the formulas]"""
+        self.stats: Dict[Tuple[str, str], List[float]] = {}
+
+    def operation(self) -> str:
+        stack = getattr(self.__local, "stack", None)
+        if not stack:
+            return NO_OPERATION
+        return stack[-1]
+
+    @contextmanager
+    def operation_scope(self, name: str):
+        stack = getattr(self.__local, "stack", None)
+        if stack is None:
+            stack = self.__local.stack = []
+        stack.append(name)
+        try:
+            yield
+        finally:
+            stack.pop()
+
+    def in_current_operation(self, function: Callable) -> Callable:
+        """Wraps 'function' so that the calls it makes in another thread, e.g. in a thread pool,
+        are attributed to the operation running in this thread"""
+        stack = list(getattr(self.__local, "stack", None) or [])
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            previous = getattr(self.__local, "stack", None)
+            self.__local.stack = list(stack)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.__local.stack = previous
+
+        return wrapper
+
+    def record(self, tool: str, exec_time: float = 0.0, size: int = 0):
+        if not PROFILE:
+            return
+        key = (self.operation(), tool)
+        with self.__lock:
+            entry = self.stats.get(key)
+            if entry is None:
+                entry = self.stats[key] = [0, 0.0, 0]
+            entry[0] += 1
+            entry[1] += exec_time
+            entry[2] += size
+
+    @contextmanager
+    def timed(self, tool: str, size: int = 0):
+        start_time = time.time()
+        try:
+            yield
+        finally:
+            self.record(tool, time.time() - start_time, size)
+
+    def merge(self, stats: Dict[Tuple[str, str], List[float]]):
+        """Adds the stats collected by another process"""
+        with self.__lock:
+            for key, (calls, exec_time, size) in stats.items():
+                entry = self.stats.get(key)
+                if entry is None:
+                    entry = self.stats[key] = [0, 0.0, 0]
+                entry[0] += calls
+                entry[1] += exec_time
+                entry[2] += size
+
+    def clear(self):
+        with self.__lock:
+            self.stats = {}
+
+    def report(self) -> str:
+        with self.__lock:
+            stats = {key: list(entry) for key, entry in self.stats.items()}
+
+        ret = "\n~~~~~~~~~~PROFILE~~~~~~~~~~~~~~~~\n"
+        ret += "TOOL".ljust(22) + "CALLS".rjust(10) + "TIME".rjust(14) + "\n"
+        tools = {}
+        for (_, tool), (calls, exec_time, size) in stats.items():
+            total = tools.setdefault(tool, [0, 0.0, 0])
+            total[0] += calls
+            total[1] += exec_time
+        for tool, (calls, exec_time, _) in sorted(tools.items(), key=lambda x: -x[1][1]):
+            ret += tool.ljust(22) + str(calls).rjust(10) + (format(exec_time, '.3f') + "sec").rjust(14) + "\n"
+
+        ret += "\n" + "OPERATION".ljust(30) + "TOOL".ljust(22) + "CALLS".rjust(10) + "TIME".rjust(14) + \
+               "AVG SIZE".rjust(12) + "\n"
+        for (operation, tool), (calls, exec_time, size) in sorted(stats.items(), key=lambda x: -x[1][1]):
+            ret += operation.ljust(30) + tool.ljust(22) + str(calls).rjust(10) + \
+                   (format(exec_time, '.3f') + "sec").rjust(14) + format(size / calls, '.1f').rjust(12) + "\n"
+        ret += "~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~\n"
+        return ret
+
+
+"""Shared profiler, the stats of the jobs of run_parallel are merged into it"""
+profiler = Profiler()
+
+
+def profiled(operation: str) -> Callable:
+    """Decorator attributing the calls made by the function to 'operation'"""
+
+    def decorator(function: Callable) -> Callable:
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with profiler.operation_scope(operation):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
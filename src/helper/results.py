@@ -0,0 +1,74 @@
+import json
+import os
+import time
+from typing import Dict, List
+
+from checks.nusmv import nusmv_cache
+from checks.syntax import formula_size
+from controller.synthesis import strix_counts, synthesis_phases
+from goals.cgtgoal import CGTGoal
+
+"""Machine-readable results of the runs, one JSON object per line.
+Each record has the stage that produced it, the time it was written and the number of checks done by this
+process since the previous record (the checks of the jobs run in other processes are not counted)"""
+
+RESULTS_FILE = "RESULTS.jsonl"
+
+
+def checker_counts() -> Dict[str, int]:
+    """Checks done by this process so far, a miss of the cache of nuXmv is a call to nuXmv"""
+    return {
+        "nuxmv_calls": nusmv_cache.misses,
+        "nuxmv_cache_hits": nusmv_cache.hits,
+        "strix_calls": strix_counts["calls"],
+        "strix_cache_hits": strix_counts["cache_hits"],
+    }
+
+
+def goal_sizes(goal: CGTGoal) -> Dict[str, int]:
+    return {
+        "assumptions_size": sum(formula_size(c.assumptions.formula.formula) for c in goal.contracts),
+        "guarantees_size": sum(formula_size(c.guarantees.formula.formula) for c in goal.contracts),
+    }
+
+
+def phases_of(controller_input_file: str) -> Dict[str, float]:
+    return {phase.lower(): exec_time for phase, exec_time in synthesis_phases(controller_input_file)}
+
+
+class ResultsWriter:
+    """Appends the records to 'file_path' as soon as they are written, 'fields' are added to every record.
+    The previous records in the file are removed unless 'append' is set"""
+
+    def __init__(self, file_path: str, append: bool = False, **fields):
+        self.file_path = file_path
+        self.fields = fields
+        self.__counts = checker_counts()
+
+        dirname = os.path.dirname(file_path)
+        if not os.path.exists(dirname):
+            os.makedirs(dirname)
+        if not append and os.path.exists(file_path):
+            os.remove(file_path)
+
+    def write(self, stage: str, **record):
+        counts = checker_counts()
+        line = {"stage": stage, "timestamp": time.time()}
+        line.update(self.fields)
+        line.update(record)
+        for name, count in counts.items():
+            line[name] = count - self.__counts[name]
+        self.__counts = counts
+
+        with open(self.file_path, "a+") as f:
+            f.write(json.dumps(line) + "\n")
+            f.flush()
+
+
+def read_results(file_path: str) -> List[dict]:
+    records = []
+    with open(file_path) as f:
+        for line in f:
+            if line.strip() != "":
+                records.append(json.loads(line))
+    return records
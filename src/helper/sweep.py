@@ -0,0 +1,137 @@
+import itertools
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+from goals.cgtgoal import CGTGoal
+from helper.logger import get_logger
+from helper.parallel import run_parallel
+
+"""Sweep of the clustering over all the subsets of goals.
+The realizability of each goal is computed once and shared by all the subsets, the subsets are run in parallel
+and each finished subset is appended to the progress file, so that an interrupted sweep can be resumed"""
+
+PROGRESS_FILE = "SWEEP_PROGRESS.jsonl"
+
+"""Result of the jobs that timed out, they are run again when the sweep is resumed"""
+JOB_TIMEOUT = "timeout"
+
+logger = get_logger(__name__)
+
+
+def load_progress(progress_file: str) -> Dict[str, dict]:
+    """Records of the finished jobs by id, the last one wins"""
+    records = {}
+    if not os.path.exists(progress_file):
+        return records
+    with open(progress_file) as f:
+        for line in f:
+            line = line.strip()
+            if line == "":
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                """Last line of an interrupted sweep"""
+                continue
+            records[record["id"]] = record
+    return records
+
+
+def append_progress(progress_file: str, record: dict):
+    with open(progress_file, "a+") as f:
+        f.write(json.dumps(record) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def goal_realizability(job: Tuple[CGTGoal, str]) -> Tuple[bool, bool, float]:
+    """job: (goal, folder_path), returns (controller_generated, trivial, exec_time) of the goal alone"""
+    from run_clustering import create_general_controller_from_goals
+    goal, folder_path = job
+    return create_general_controller_from_goals([goal], folder_path, "AND")
+
+
+def run_subset(job: Tuple[List[CGTGoal], str, Dict[str, Tuple[bool, bool, float]]]) -> Optional[dict]:
+    """job: (goals, result_folder, goals_realizability), returns None if the CGT cannot be built"""
+    from run_clustering import run
+    goals, result_folder, goals_realizability = job
+    try:
+        rnc, rcc, rco, t1, t2, t3 = run(goals,
+                                        result_folder,
+                                        no_clusters=True,
+                                        clusters_origianl=True,
+                                        clusters_mutex=True,
+                                        workers=1,
+                                        goals_realizability=goals_realizability)
+    except SystemExit:
+        return None
+    return {"rnc": rnc, "rcc": rcc, "rco": rco, "t1": t1, "t2": t2, "t3": t3}
+
+
+def subsets_of(goals: List[CGTGoal]) -> List[Tuple[str, int, int, List[CGTGoal]]]:
+    """(id, size, index, subset) of the proper non-empty subsets in the order of itertools.combinations,
+    the goals themselves if there is only one"""
+    if len(goals) <= 1:
+        return [("comb_1", 1, 0, list(goals))]
+    subsets = []
+    for i in range(1, len(goals)):
+        for j, subset in enumerate(itertools.combinations(goals, i)):
+            subsets.append(("comb_" + str(i) + "_" + str(j), i, j, list(subset)))
+    return subsets
+
+
+def sweep(goals: List[CGTGoal], results_path: str, workers: int = None, timeout: float = None,
+          resume: bool = False) -> List[dict]:
+    """Runs the clustering on every subset of 'goals' and returns the records of the subsets in order.
+    With 'resume' the jobs already recorded in the progress file of 'results_path' are not run again,
+    except the ones that timed out"""
+    if not os.path.exists(results_path):
+        os.makedirs(results_path)
+    progress_file = os.path.join(results_path, PROGRESS_FILE)
+    if not resume and os.path.exists(progress_file):
+        os.remove(progress_file)
+    done = {job_id: record for job_id, record in load_progress(progress_file).items() if not record.get("timeout")}
+
+    """Realizability of the individual goals, shared by all the subsets"""
+    goal_jobs = [g for g in goals if "goal_" + g.name not in done]
+    logger.info("Realizability of %d goals (%d resumed)", len(goal_jobs), len(goals) - len(goal_jobs))
+
+    def goal_done(i, result):
+        if result is None or result == JOB_TIMEOUT:
+            return
+        controller, trivial, exec_time = result
+        record = {"id": "goal_" + goal_jobs[i].name, "realizable": controller, "trivial": trivial, "time": exec_time}
+        done[record["id"]] = record
+        append_progress(progress_file, record)
+
+    run_parallel(goal_realizability,
+                 [(g, results_path + "/goal_list/" + g.name + "/") for g in goal_jobs],
+                 workers, timeout, default=JOB_TIMEOUT, callback=goal_done)
+
+    goals_realizability = {}
+    for g in goals:
+        record = done.get("goal_" + g.name)
+        if record is not None:
+            goals_realizability[g.name] = (record["realizable"], record["trivial"], record["time"])
+
+    """Subsets of goals"""
+    subsets = subsets_of(goals)
+    subset_jobs = [s for s in subsets if s[0] not in done]
+    logger.info("Clustering of %d subsets (%d resumed)", len(subset_jobs), len(subsets) - len(subset_jobs))
+
+    def subset_done(i, result):
+        job_id, size, index, subset = subset_jobs[i]
+        record = {"id": job_id, "size": size, "index": index, "goals": [g.name for g in subset],
+                  "failed": result is None, "timeout": result == JOB_TIMEOUT}
+        if isinstance(result, dict):
+            record.update(result)
+        done[job_id] = record
+        append_progress(progress_file, record)
+
+    run_parallel(run_subset,
+                 [(subset, results_path + "/" + job_id, goals_realizability)
+                  for job_id, _, _, subset in subset_jobs],
+                 workers, timeout, default=JOB_TIMEOUT, callback=subset_done)
+
+    return [done[job_id] for job_id, _, _, _ in subsets]
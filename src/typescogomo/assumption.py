@@ -1,3 +1,4 @@
+from checks.bdd import canonical_form
 from typescogomo.formula import LTL
 from typescogomo.variables import Variables
 
@@ -26,6 +27,26 @@ class Context(Assumption):
         else:
             super().__init__(formula, variables, kind="context")
 
+    def __eq__(self, other: 'LTL'):
+        """Contexts of the shape 'state & G(invariant)' are equal if they have the same canonical form,
+        the other formulas are compared by nuXmv"""
+        if isinstance(other, LTL) and self.tree is not None and other.tree is not None:
+            form_a = canonical_form(self.tree)
+            if form_a is not None:
+                form_b = canonical_form(other.tree)
+                if form_b is not None:
+                    return form_a == form_b
+        return super().__eq__(other)
+
+    def __hash__(self):
+        """Consistent with '__eq__' as long as the equal contexts have the same variables: the contexts are hashed
+        on their variables, since contexts that are not the same formula can be equal.
+        Equivalent contexts having different variables (e.g. a variable that does not affect the formula) have
+        different hashes, so they are not merged in sets and dicts"""
+        if self.variables is None:
+            return hash(())
+        return hash(tuple(sorted(v.name for v in self.variables.list)))
+
 
 class Expectation(Assumption):
 
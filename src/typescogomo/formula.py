@@ -1,37 +1,62 @@
-from copy import deepcopy
 from typing import Tuple, Union, List
 
-from checks.nusmv import check_satisfiability, check_validity
-from checks.tools import And, Implies, Not
+from checks.nusmv import check_satisfiability, check_validity, check_query, VALIDITY
+from checks.syntax import Node, Operator, to_node_or_raw, TRUE, FALSE
+from checks.tools import Implies
+from helper.logger import get_logger
 from typescogomo.variables import Variables, extract_variable
 
+logger = get_logger(__name__)
+
+"""Check the satisfiability of the formulas on demand instead of when they are created.
+Callers that need the formula to be consistent call 'validate'"""
+LAZY_CONSISTENCY = True
+
 
 class LTL:
 
-    def __init__(self, formula: str, variables: Variables = None):
-        if (formula == "TRUE" or formula == "FALSE") and variables is None:
-            self.__formula: str = formula
-            self.__variables: Variables = Variables()
+    def __init__(self, formula: Union[str, Node] = None, variables: Variables = None):
+        """The formula is stored as a hash-consed syntax tree, its string form is generated lazily.
+        A formula that cannot be parsed is kept as it is written (a 'raw' node) and it is checked by nuXmv"""
+        self.__tree: Node = None
+        self.__variables: Variables = variables
+
+        """Memoized satisfiability, valid as long as the formula is the tree it has been computed on"""
+        self.__satisfiable: bool = None
+        self.__satisfiable_tree: Node = None
+
+        if formula is None:
             return
 
-        if formula is not None:
+        self.__tree = to_node_or_raw(formula)
 
-            if variables is None:
-                variables = extract_variable(str(formula))
+        if (self.__tree is TRUE or self.__tree is FALSE) and variables is None:
+            self.__variables = Variables()
+            return
 
-            self.__formula: str = formula
-            self.__variables: Variables = variables
+        if variables is None:
+            self.__variables = extract_variable(self.__tree)
 
-            if not self.is_satisfiable():
-                raise InconsistentException(self, self)
+        if not LAZY_CONSISTENCY:
+            self.validate()
 
     @property
     def formula(self) -> str:
-        return self.__formula
+        if self.__tree is None:
+            return None
+        return str(self.__tree)
 
     @formula.setter
-    def formula(self, value: str):
-        self.__formula = value
+    def formula(self, value: Union[str, Node]):
+        self.__tree = to_node_or_raw(value) if value is not None else None
+
+    @property
+    def tree(self) -> Node:
+        return self.__tree
+
+    @tree.setter
+    def tree(self, value: Node):
+        self.__tree = value
 
     @property
     def variables(self):
@@ -41,15 +66,43 @@ class LTL:
     def variables(self, value: Variables):
         self.__variables = value
 
+    def copy(self) -> 'LTL':
+        """Copy sharing the syntax tree, which is immutable.
+        The variables are copied since they are extended in place"""
+        new = object.__new__(type(self))
+        new.__dict__.update(self.__dict__)
+        if self.__variables is not None:
+            new.variables = self.__variables.copy()
+        return new
+
     def negate(self):
         """Modifies the LTL formula with its negation"""
-        self.formula = '!(' + self.formula + ')'
+        self.tree = Node("!", self.tree)
 
     def is_true(self):
-        return self.formula == "TRUE"
-
-    def is_satisfiable(self):
-        return check_satisfiability(self.variables.get_nusmv_names(), self.formula)
+        return self.tree is TRUE
+
+    def is_satisfiable(self) -> bool:
+        if self.__satisfiable_tree is not self.__tree:
+            if self.__tree is TRUE:
+                self.__satisfiable = True
+            elif self.__tree is FALSE:
+                self.__satisfiable = False
+            else:
+                self.__satisfiable = check_satisfiability(self.variables.get_nusmv_names(), self.formula)
+            self.__satisfiable_tree = self.__tree
+        return self.__satisfiable
+
+    def set_satisfiable(self, satisfiable: bool):
+        """Memoizes the satisfiability of the current formula, when it is known without checking it"""
+        self.__satisfiable = satisfiable
+        self.__satisfiable_tree = self.__tree
+
+    def validate(self) -> 'LTL':
+        """Raises InconsistentException if the formula is not satisfiable"""
+        if not self.is_satisfiable():
+            raise InconsistentException(self, self)
+        return self
 
     def conjoin_with(self, others: Union['LTL', List['LTL']]) -> List['LTL']:
         """Returns list of LTL that have been successfully conjoined"""
@@ -69,58 +122,62 @@ class LTL:
     def conjoin_with_formula(self, other: 'LTL') -> bool:
         """Returns True if other has been conjoined"""
 
-        if self.formula == "FALSE":
-            print("The conjunction has no effects since the current formula is FALSE")
+        if self.tree is FALSE:
+            logger.debug("The conjunction has no effects since the current formula is FALSE")
             return False
-        if self.formula == "TRUE":
-            self.formula = deepcopy(other.formula)
-            self.variables = deepcopy(other.variables)
+        if self.tree is TRUE:
+            self.tree = other.tree
+            self.variables = other.variables.copy()
             return True
 
-        if other.formula == "FALSE":
-            self.formula = "FALSE"
+        if other.tree is FALSE:
+            self.tree = FALSE
             return True
-        if other.formula == "TRUE":
-            print("The conjunction has no effects since the other formula is FALSE")
+        if other.tree is TRUE:
+            logger.debug("The conjunction has no effects since the other formula is FALSE")
             return False
 
         if other <= self:
             """the other formula is a refinement of the current formula"""
-            self.formula = deepcopy(other.formula)
-            self.variables = deepcopy(other.variables)
+            self.tree = other.tree
+            self.variables = other.variables.copy()
             return True
 
         if self.is_satisfiable_with(other):
 
-            new_formula = deepcopy(self)
+            new_formula = self.copy()
             new_formula.variables.extend(other.variables)
-            new_formula.formula = And([new_formula.formula, other.formula])
+            new_formula.tree = Operator("&", new_formula.tree, other.tree)
 
             """If by conjoining other, the result should be a refinement of the existing formula"""
             if new_formula <= self:
-                self.formula = deepcopy(new_formula.formula)
-                self.variables = deepcopy(new_formula.variables)
+                self.tree = new_formula.tree
+                self.variables = new_formula.variables
                 return True
         else:
             raise InconsistentException(self, other)
 
     def is_satisfiable_with(self, other):
-        if self.formula == "TRUE" or other.formula == "TRUE":
+        if self.is_true() or other.is_true():
             return True
-        variables = self.variables
-        variables.extend(other.variables)
+        """The variables are not extended in place, the formulas can be shared between threads"""
+        variables = self.variables + other.variables
         return check_satisfiability(variables.get_nusmv_names(), [self.formula, other.formula])
 
     def can_provide_for(self, other):
         """Check if the set of behaviours is smaller or equal in the other set of behaviours but on the types"""
+        return check_query(self.can_provide_for_query(other))
+
+    def can_provide_for_query(self, other) -> Tuple[str, List[str], str]:
+        """Query of 'can_provide_for', so that multiple queries can be run together with 'check_many'"""
         variables = self.variables + other.variables
         proposition = Implies(self.formula, other.formula)
         for v in variables.list:
             proposition = proposition.replace(v.name, v.port_type)
-        return check_validity(variables.get_nusmv_types(), proposition)
+        return VALIDITY, variables.get_nusmv_types(), proposition
 
     def __str__(self):
-        return self.__formula
+        return self.formula
 
     def __lt__(self, other: 'LTL'):
         """Check if the set of behaviours is smaller in the other set of behaviours"""
@@ -135,11 +192,11 @@ class LTL:
         variables_a = set(self.variables.get_nusmv_names())
         variables_b = set(other.variables.get_nusmv_names())
         variables = variables_a | variables_b
-        return check_validity(list(variables), "((" + self.formula + ") -> (" + other.formula + "))")
+        return check_validity(list(variables), str(Node("->", self.tree, other.tree)))
 
     def __eq__(self, other: 'LTL'):
         """Check if the set of behaviours is equal to the other set of behaviours"""
-        if self.formula == other.formula:
+        if self.tree is other.tree:
             return True
         implied_a = self >= other
         implied_b = self <= other
@@ -162,10 +219,10 @@ class LTL:
         variables_a = set(self.variables.get_nusmv_names())
         variables_b = set(other.variables.get_nusmv_names())
         variables = variables_a | variables_b
-        return check_validity(list(variables), "((" + other.formula + ") -> (" + self.formula + "))")
+        return check_validity(list(variables), str(Node("->", other.tree, self.tree)))
 
     def __hash__(self):
-        return hash(self.__formula)
+        return hash(self.__tree)
 
 
 class InconsistentException(Exception):
@@ -181,8 +238,7 @@ def AndLTL(formulas: List[LTL]) -> LTL:
         vars = formulas[0].variables
         for i in range(1, len(formulas)):
             vars += formulas[i].variables
-        conj = ' & '.join(s.formula for s in formulas)
-        return LTL("(" + conj + ")", vars)
+        return LTL(Operator("&", *[f.tree for f in formulas]), vars)
     elif len(formulas) == 1:
         return formulas[0]
     else:
@@ -193,15 +249,13 @@ def ImpliesLTL(one: LTL, two: LTL) -> LTL:
     """Returns an LTL formula representing the logical implication of list_propoositions"""
     vars =  one.variables
     vars += two.variables
-    formula = "(" + one.formula + ") -> (" + two.formula + ")"
-    return LTL(formula, vars)
+    return LTL(Node("->", one.tree, two.tree), vars)
 
 
 def NotLTL(element: LTL) -> LTL:
     """Returns an str formula representing the logical AND of list_propoositions"""
     vars = element.variables
-    formula = Not(element.formula)
-    return LTL(formula, vars)
+    return LTL(Node("!", element.tree), vars)
 
 
 def OrLTL(formulas: List[LTL]) -> LTL:
@@ -210,8 +264,7 @@ def OrLTL(formulas: List[LTL]) -> LTL:
         vars = formulas[0].variables
         for i in range(1, len(formulas)):
             vars += formulas[i].variables
-        conj = ' | '.join(s.formula for s in formulas)
-        return LTL("(" + conj + ")", vars)
+        return LTL(Operator("|", *[f.tree for f in formulas]), vars)
     elif len(formulas) == 1:
         return formulas[0]
     else:
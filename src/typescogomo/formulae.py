@@ -1,14 +1,19 @@
 from typing import Union, List
 
-from checks.tools import And
+from checks.syntax import Operator, TRUE, FALSE, conjuncts, atom_set, is_temporal
+from helper.logger import get_logger
 from typescogomo.formula import LTL, InconsistentException
 from typescogomo.assumption import Assumption
 from typescogomo.guarantee import Guarantee
 from typescogomo.variables import Variables
 
+logger = get_logger(__name__)
+
 
 class LTLs:
-    """List of LTL formulae in conjunction with each other"""
+    """List of LTL formulae in conjunction with each other.
+    The conjunction is built incrementally: adding a formula checks only the satisfiability of the new conjunction,
+    removing a formula rebuilds the conjunction of the remaining ones without any check"""
 
     def __init__(self, formulae: List['LTL'], simplify=True):
         "formulae: list of formula to conjoin"
@@ -19,36 +24,33 @@ class LTLs:
         "List of LTL formulae in conjunction that it is formed of"
         self.__list: List[LTL] = None
 
-
         if len(formulae) == 0:
             self.__formula: LTL = LTL("TRUE")
             self.__list: List[LTL] = []
         else:
             if simplify:
-                self.__formula: LTL = LTL(formulae[0].formula, formulae[0].variables)
+                self.__formula: LTL = LTL(formulae[0].tree, Variables() + formulae[0].variables)
                 self.__list: List[LTL] = [formulae[0]]
-                if len(formulae) > 1:
-                    try:
-                        added_formulae = self.__formula.conjoin_with(formulae[1:])
-                        self.list.extend(added_formulae)
-
-                    except InconsistentException as e:
-                        raise e
+                self.add(formulae[1:])
 
             else:
-
-                variables = Variables()
-                formulae_str = []
-
-                for formula in formulae:
-                    variables.extend(formula.variables)
-                    formulae_str.append(formula.formula)
-                try:
-                    self.__formula: LTL = LTL(And(formulae_str), variables)
-                except InconsistentException as e:
-                    raise e
-
+                """The satisfiability of the conjunction is checked by 'validate'"""
                 self.__list: List[LTL] = formulae
+                self.__rebuild()
+
+    def __rebuild(self):
+        """Conjunction of the formulae in the list. Any subset of a satisfiable conjunction is satisfiable,
+        so no check is needed"""
+        variables = Variables()
+        trees = {}
+        for formula in self.__list:
+            variables.extend(formula.variables)
+            trees[formula.tree] = None
+        trees = [tree for tree in trees if tree is not TRUE]
+        if len(trees) == 0:
+            self.__formula = LTL("TRUE", variables)
+        else:
+            self.__formula = LTL(Operator("&", *trees), variables)
 
     @property
     def list(self):
@@ -56,16 +58,22 @@ class LTLs:
 
     @list.setter
     def list(self, value: List['LTL']):
-        if value is not None:
-
-            self.__formula = LTL(value[0].formula, value[0].variables)
-
-            added_formulae = self.__formula.conjoin_with(value[1:])
-
-            self.__list: List[LTL] = added_formulae
+        if value is not None and len(value) > 0:
+            self.__formula = LTL(value[0].tree, Variables() + value[0].variables)
+            self.__list: List[LTL] = [value[0]]
+            self.add(value[1:])
         else:
+            self.__formula = LTL("TRUE")
             self.__list = []
 
+    def copy(self) -> 'LTLs':
+        """The formulae are copied since they can be modified in place (e.g. by 'set_context')"""
+        new = object.__new__(type(self))
+        new.__dict__.update(self.__dict__)
+        new.__formula = self.__formula.copy()
+        new.__list = [formula.copy() for formula in self.__list]
+        return new
+
     @property
     def formula(self) -> LTL:
         return self.__formula
@@ -74,6 +82,11 @@ class LTLs:
     def variables(self):
         return self.formula.variables
 
+    def validate(self) -> 'LTLs':
+        """Raises InconsistentException if the conjunction is not satisfiable"""
+        self.formula.validate()
+        return self
+
     def is_universe(self):
         return self.formula.is_true()
 
@@ -81,18 +94,55 @@ class LTLs:
         return self.formula.is_satisfiable_with(other.formula)
 
     def extend(self, other: 'LTLs'):
-        try:
-            self.__formula = LTL(other.list[0].formula, other.list[0].variables)
-        except Exception as e:
-            print("WHT")
-            raise e
-        added_formulae = self.__formula.conjoin_with(other.list[1:])
-        self.list.extend(added_formulae)
+        self.add(other.list)
 
     def add(self, formulae: Union['LTL', List['LTL']]):
+        """Conjoins the formulae one by one,
+        raises InconsistentException if one of them makes the conjunction unsatisfiable"""
+        if isinstance(formulae, LTL):
+            formulae = [formulae]
+
+        for formula in formulae:
+            if self.__conjoin(formula):
+                self.__list.append(formula)
+
+    def __conjoin(self, other: 'LTL') -> bool:
+        """Returns True if 'other' has been conjoined"""
+        current = self.__formula
+
+        if current.tree is FALSE:
+            logger.debug("The conjunction has no effects since the current formula is FALSE")
+            return False
+        if other.tree is TRUE:
+            return False
+        if other.tree is FALSE:
+            current.tree = FALSE
+            return True
+
+        if current.tree is TRUE:
+            current.tree = other.tree
+            current.variables.extend(other.variables)
+            return True
+
+        if other.tree in conjuncts(current.tree):
+            """Already in the conjunction"""
+            return True
+
+        if atom_set(current.tree).isdisjoint(atom_set(other.tree)) and \
+                independent(current) and independent(other) and current.is_satisfiable():
+            """Formulae over disjoint variables are satisfiable together iff they are satisfiable separately,
+            the satisfiability is memoized on them"""
+            satisfiable = other.is_satisfiable()
+        else:
+            satisfiable = current.is_satisfiable_with(other)
 
-        added_formulae = self.formula.conjoin_with(formulae)
-        self.list.extend(added_formulae)
+        if not satisfiable:
+            raise InconsistentException(current, other)
+
+        current.tree = Operator("&", current.tree, other.tree)
+        current.variables.extend(other.variables)
+        current.set_satisfiable(True)
+        return True
 
     def remove(self, formulae: Union['LTL', List['LTL']]):
 
@@ -100,23 +150,30 @@ class LTLs:
             formulae = [formulae]
 
         for formula in formulae:
-            if formula in self.list:
-                self.list.remove(formula)
+            for i, existing in enumerate(self.__list):
+                if existing is formula or existing.tree is formula.tree:
+                    del self.__list[i]
+                    break
             else:
                 Exception("LTL formula not found, cannot be removed")
 
-        if len(self.list) > 0:
-            self.__formula = LTL(self.list[0].formula, self.list[0].variables)
-            if len(self.list) > 1:
-                self.__formula.conjoin_with(self.list[1:])
-
-        else:
-            self.list = None
+        self.__rebuild()
 
     def __str__(self):
         return str(self.formula)
 
 
+def independent(ltl: LTL) -> bool:
+    """True if the satisfiability of 'ltl' does not depend on the formulae over other variables: all its variables
+    are atoms of the parsed formula and it has no temporal operators over variables renamed to a port type"""
+    names = set(v.name for v in ltl.variables.list)
+    if not names <= atom_set(ltl.tree):
+        return False
+    if is_temporal(ltl.tree) and any(v.port_type != v.name for v in ltl.variables.list):
+        return False
+    return True
+
+
 class Assumptions(LTLs):
     def __init__(self, assumptions: Union[List[Assumption], Assumption] = None):
         if assumptions is None:
@@ -1,5 +1,3 @@
-from copy import deepcopy
-
 from checks.tools import Implies
 from typescogomo.formula import LTL
 from typescogomo.variables import Variables
@@ -33,7 +31,7 @@ class Guarantee(LTL):
         return self.__saturated
 
     def saturate_with(self, assumptions):
-        new_vars = deepcopy(self.variables)
+        new_vars = self.variables.copy()
         new_vars.extend(assumptions.variables)
         saturated = Implies(str(assumptions.formula), self.unsaturated)
         self.__init__(self.unsaturated, new_vars, saturated)
\ No newline at end of file
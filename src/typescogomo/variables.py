@@ -1,5 +1,5 @@
-from copy import deepcopy
-from typing import List, Union
+from typing import Dict, List, Union
+from checks.syntax import Node, to_node_or_raw, atoms, integer_atoms
 from helper.tools import extract_terms
 
 
@@ -8,6 +8,8 @@ class Type(object):
     and variable_type: used for example when a component requires multiple variables of the same type
     but having different names. If the port_type is not specified then it's the same as the name of the variable"""
 
+    __slots__ = ("name", "basic_type", "port_type")
+
     def __init__(self, name: str, basic_type: str, port_type: str = None):
         """Name of the variable"""
         self.name = name
@@ -33,92 +35,130 @@ class Type(object):
 
 class Boolean(Type):
 
+    __slots__ = ()
+
     def __init__(self, name: str, port_type: str = None):
         super().__init__(name, "boolean", port_type=port_type)
 
 
 class Integer(Type):
 
+    __slots__ = ()
+
     def __init__(self, name: str, min: int, max: int, port_type: str = None):
         super().__init__(name, str(min) + ".." + str(max), port_type=port_type)
 
 
 class BoundedInt(Integer):
 
+    __slots__ = ()
+
     def __init__(self, name: str, port_type: str = None):
         super().__init__(name, min=-100, max=100, port_type=port_type)
 
 
 class BoundedNat(Integer):
 
+    __slots__ = ()
+
     def __init__(self, name: str, port_type: str = None):
         super().__init__(name, min=0, max=100, port_type=port_type)
 
 
 class Variables(object):
+    """Set of variables indexed by name, in order of insertion"""
+
+    __slots__ = ("__index", "__nusmv_names", "__nusmv_types")
 
     def __init__(self, variables: Union[List['Type'], Type] = None):
-        if variables is None:
-            self.__variables = []
-        else:
-            if isinstance(variables, Type):
-                variables = [variables]
-            self.__variables = variables
+        self.__index: Dict[str, Type] = {}
+        self.__nusmv_names: List[str] = None
+        self.__nusmv_types: List[str] = None
+        if variables is not None:
+            self.add(variables)
 
     @property
-    def list(self):
-        return self.__variables
+    def list(self) -> List['Type']:
+        return list(self.__index.values())
 
     @list.setter
-    def list(self, value):
-        self.__variables = value
+    def list(self, value: List['Type']):
+        self.__index = {}
+        self.__changed()
+        self.add(value)
+
+    def __changed(self):
+        self.__nusmv_names = None
+        self.__nusmv_types = None
+
+    def __contains__(self, var: Union['Type', str]) -> bool:
+        if isinstance(var, Type):
+            return var.name in self.__index and self.__index[var.name] == var
+        return var in self.__index
+
+    def __len__(self):
+        return len(self.__index)
+
+    def __iter__(self):
+        return iter(self.__index.values())
 
     def __add__(self, other):
-        res = deepcopy(self)
+        res = self.copy()
         res.extend(other)
         return res
 
+    def copy(self) -> 'Variables':
+        """The types are never modified, only the index is copied"""
+        res = Variables()
+        res.__index = dict(self.__index)
+        res.__nusmv_names = self.__nusmv_names
+        res.__nusmv_types = self.__nusmv_types
+        return res
+
+    def __getstate__(self):
+        return self.list
+
+    def __setstate__(self, state):
+        self.__init__(state)
+
     def get_nusmv_names(self):
         """Get List[str] for nuxmv"""
-        tuple_vars = []
-        for v in self.list:
-            tuple_vars.append(v.name + ": " + v.basic_type)
-        return tuple_vars
+        if self.__nusmv_names is None:
+            self.__nusmv_names = [v.name + ": " + v.basic_type for v in self.__index.values()]
+        return list(self.__nusmv_names)
 
     def get_nusmv_types(self):
         """Get List[str] for nuxmv"""
-        tuple_vars = []
-        for v in self.list:
-            tuple_vars.append(v.port_type + ": " + v.basic_type)
-        return tuple_vars
+        if self.__nusmv_types is None:
+            self.__nusmv_types = [v.port_type + ": " + v.basic_type for v in self.__index.values()]
+        return list(self.__nusmv_types)
 
     def n_shared_variables_with(self, other: 'Variables'):
-        return len(list(set(self.list) & set(other.list)))
+        return len(self.shared_variables_with(other))
 
     def shared_variables_with(self, other: 'Variables') -> List[Type]:
-        vars_names = list(set(self.list) & set(other.list))
-        return vars_names
+        if len(other.__index) < len(self.__index):
+            self, other = other, self
+        return [v for name, v in self.__index.items() if name in other.__index and other.__index[name] == v]
 
     def extend(self, other: 'Variables'):
-        for v in other.list:
-            self.add(v)
+        self.add(other.list)
 
     def add(self, var: Union['Type', List['Type']]):
         if isinstance(var, Type):
             var = [var]
 
         for v in var:
-            for ex_v in self.list:
-                if v.name == ex_v.name:
-                    type_a = type(v).__name__
-                    type_b = type(ex_v).__name__
-                    if type_a != type_b:
-                        raise Exception("Variable " + str(v) + " is already present but "
-                                                               "is of tyoe " + type_a + " instead of " + type_b)
-                    else:
-                        return
-
-            self.list.append(v)
+            ex_v = self.__index.get(v.name)
+            if ex_v is None:
+                self.__index[v.name] = v
+                self.__changed()
+            else:
+                type_a = type(v).__name__
+                type_b = type(ex_v).__name__
+                if type_a != type_b:
+                    raise Exception("Variable " + str(v) + " is already present but "
+                                                           "is of tyoe " + type_a + " instead of " + type_b)
 
     def remove(self, var: Union['Type', List['Type']]):
 
@@ -126,13 +166,37 @@ class Variables(object):
             var = [var]
 
         for v in var:
-            if v in self.list:
-                self.list.remove(v)
+            if v in self:
+                del self.__index[v.name]
+                self.__changed()
             else:
                 Exception("Variable " + v.name + " not found, it cannot be removed")
 
 
-def extract_variable(formula: str) -> 'Variables':
+def extract_variable(formula: Union[str, Node]) -> 'Variables':
+    """Variables of the formula: the integer atoms are integers, the others are booleans"""
+    tree = to_node_or_raw(formula)
+    if tree.op == "raw":
+        return extract_terms_variables(tree.args[0])
+    integers = integer_atoms(tree)
+
+    context_vars: List[Type] = []
+
+    for var_name in atoms(tree):
+        if var_name in integers:
+            """TODO: remove hard-coding"""
+            if var_name == "time":
+                context_vars.append(Integer(var_name, 0, 24))
+            else:
+                context_vars.append(BoundedNat(var_name))
+        else:
+            context_vars.append(Boolean(var_name))
+
+    return Variables(context_vars)
+
+
+def extract_terms_variables(formula: str) -> 'Variables':
+    """Variables of a formula that cannot be parsed, from its terms"""
     var_names = extract_terms(formula)
 
     context_vars: List[Type] = []
@@ -0,0 +1,65 @@
+from checks.bdd import bdd, to_bdd, canonical_form, check_state_invariant
+from checks.syntax import parse
+
+variables = [v + ": boolean" for v in ["a", "b", "c", "day", "night", "shop", "warehouse"]]
+
+
+def test_canonical_bdd():
+    assert to_bdd(parse("a & (b | c)")) == to_bdd(parse("(a & b) | (c & a)"))
+    assert to_bdd(parse("a -> b")) == to_bdd(parse("!a | b"))
+    assert to_bdd(parse("a & !a")) == bdd.FALSE
+    assert to_bdd(parse("F(a)")) is None
+
+    assert canonical_form(parse("day & G(day <-> !night)")) == canonical_form(parse("!night & day & G(night xor day)"))
+    assert canonical_form(parse("night & G(!night)")) == canonical_form(parse("day & G(FALSE)"))
+
+
+def test_queries():
+    rules = "G((shop & !warehouse) | (warehouse & !shop)) & G(day <-> !night)"
+
+    """Satisfiability: !(f) holds iff f is unsatisfiable"""
+    assert check_state_invariant(variables, "!(day & night & " + rules + ")") is True
+    assert check_state_invariant(variables, "!(day & shop & " + rules + ")") is False
+
+    """Inclusion"""
+    assert check_state_invariant(variables, "((day & shop & " + rules + ") -> day)") is True
+    assert check_state_invariant(variables, "((day & " + rules + ") -> (day & shop))") is False
+    assert check_state_invariant(variables, "((day & G(a)) -> G(a | b))") is True
+    assert check_state_invariant(variables, "((day & G(a | b)) -> G(a))") is False
+
+    """Validity"""
+    assert check_state_invariant(variables, "G(a | !a)") is True
+    assert check_state_invariant(variables, "G(a) | b") is None
+
+    """Not decided in-process"""
+    assert check_state_invariant(variables, "!(day & G(F(a)))") is None
+    assert check_state_invariant(["day: boolean"], "!(day & x)") is None
+
+
+def test_context_hash(monkeypatch):
+    import typescogomo.formula as formula_module
+    from typescogomo.assumption import Context
+
+    """The formulas that are not in canonical form are compared by nuXmv"""
+    checked = []
+
+    def check_validity(variables, formula):
+        checked.append(formula)
+        return "F(" not in formula
+
+    monkeypatch.setattr(formula_module, "check_validity", check_validity)
+
+    a = Context(formula="day & G(day <-> !night)")
+    b = Context(formula="!night & day & G(night xor day)")
+
+    assert a == b
+    assert hash(a) == hash(b)
+    assert len({a, b}) == 1
+    assert checked == []
+
+    assert a == Context(formula="day & !night & G(X(day) <-> X(!night))")
+    assert a != Context(formula="F(day)")
+    assert len(checked) > 0
+
+    """The contexts over different variables are in different buckets"""
+    assert hash(a) != hash(Context(formula="shop & G(shop <-> !warehouse)"))
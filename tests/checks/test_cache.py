@@ -0,0 +1,33 @@
+from checks.cache import ResultCache, canonical_key
+
+
+def test_canonical_key():
+    key_a = canonical_key(["a: boolean", "b: boolean"], "G(a ->  b)")
+    key_b = canonical_key(["b: boolean;", "a: boolean", "a: boolean"], " G(a -> b) ")
+    key_c = canonical_key(["a: boolean", "b: boolean"], "G(b -> a)")
+
+    assert key_a == key_b
+    assert key_a != key_c
+
+
+def test_memory_lru():
+    cache = ResultCache("test", max_size=2, persistent=False)
+
+    cache.put("a", True)
+    cache.put("b", False)
+    assert cache.get("a") is True
+    cache.put("c", True)
+
+    """'b' is the least recently used"""
+    assert cache.get("b") is None
+    assert cache.get("a") is True
+    assert cache.get("c") is True
+
+
+def test_disk_persistence(tmp_path):
+    cache = ResultCache("test", folder=str(tmp_path), persistent=True)
+    cache.put("key", {"realizable": True})
+
+    new_cache = ResultCache("test", folder=str(tmp_path), persistent=True)
+    assert new_cache.get("key") == {"realizable": True}
+    assert new_cache.hits == 1
@@ -0,0 +1,85 @@
+import pytest
+
+import typescogomo.formula as formula_module
+from typescogomo.formula import LTL, InconsistentException
+
+
+def test_lazy_satisfiability(monkeypatch):
+    calls = []
+
+    def check_satisfiability(variables, formula):
+        calls.append(formula)
+        return "!(a)" not in formula
+
+    monkeypatch.setattr(formula_module, "check_satisfiability", check_satisfiability)
+
+    ltl = LTL("G(a) & F(b)")
+    assert calls == []
+
+    """The result is memoized until the formula changes"""
+    assert ltl.validate() is ltl
+    assert ltl.is_satisfiable()
+    assert len(calls) == 1
+
+    ltl.formula = "G(a) & F(!(a))"
+    with pytest.raises(InconsistentException):
+        ltl.validate()
+    assert len(calls) == 2
+
+
+def test_incremental_conjunction(monkeypatch):
+    from typescogomo.formulae import LTLs
+
+    calls = []
+
+    def check_satisfiability(variables, formula):
+        calls.append(formula)
+        return True
+
+    monkeypatch.setattr(formula_module, "check_satisfiability", check_satisfiability)
+
+    a, b, c = LTL("G(a)"), LTL("F(a & b)"), LTL("G(c)")
+    conjunction = LTLs([a, b, c, LTL("G(a)")])
+    assert str(conjunction) == "(G(a) & F(a & b) & G(c))"
+
+    """One check for the shared variable 'a', one for 'G(c)' alone and none for the duplicate"""
+    assert len(calls) == 2
+
+    conjunction.remove(b)
+    assert str(conjunction) == "(G(a) & G(c))"
+    assert len(calls) == 2
+
+
+def test_conjunction_with_renamed_variables(monkeypatch):
+    from typescogomo.formulae import LTLs
+    from typescogomo.variables import Variables, Boolean
+
+    calls = []
+
+    def check_satisfiability(variables, formula):
+        calls.append(formula)
+        return True
+
+    monkeypatch.setattr(formula_module, "check_satisfiability", check_satisfiability)
+
+    renamed = LTL("G(p -> q)", Variables([Boolean("p", port_type="x"), Boolean("q")]))
+    LTLs([renamed, LTL("G(r)")])
+
+    """The invariant over a renamed variable is checked together with the other formula"""
+    assert calls == [["G(p -> q)", "G(r)"]]
+
+
+def test_satisfiable_with_keeps_the_variables(monkeypatch):
+    calls = []
+
+    def check_satisfiability(variables, formula):
+        calls.append(variables)
+        return True
+
+    monkeypatch.setattr(formula_module, "check_satisfiability", check_satisfiability)
+
+    a = LTL("G(a)")
+    b = LTL("F(b)")
+    assert a.is_satisfiable_with(b)
+    assert set(a.variables.get_nusmv_names()) == {"a: boolean"}
+    assert len(calls[0]) == 2
@@ -0,0 +1,61 @@
+import os
+import stat
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from checks.pool import NuXmvPool, NuXmvTimeout
+
+"""Fake interactive nuXmv: the model 'dies' terminates the process, the model 'hangs' never answers"""
+FAKE_NUXMV = '''#!{python}
+import sys
+model = ""
+for line in sys.stdin:
+    command = line.strip()
+    if command.startswith("read_model -i "):
+        model = open(command[len("read_model -i "):]).read()
+    elif command == "check_ltlspec":
+        if "dies" in model:
+            sys.exit(1)
+        if "hangs" in model:
+            sys.stdin.read()
+        print("-- specification " + model.strip() + " is true", flush=True)
+    elif command.startswith("echo "):
+        print(command[len("echo "):], flush=True)
+    elif command == "quit":
+        break
+'''
+
+
+@pytest.fixture
+def fake_nuxmv(tmp_path, monkeypatch):
+    path = tmp_path / "nuXmv"
+    path.write_text(FAKE_NUXMV.format(python=sys.executable))
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", str(tmp_path) + os.pathsep + os.environ["PATH"])
+
+
+def test_dead_worker_frees_its_slot(fake_nuxmv):
+    pool = NuXmvPool(size=1, timeout=10)
+
+    def check(model):
+        try:
+            return pool.check(model)
+        except Exception:
+            return None
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = list(executor.map(check, ["dies", "holds"]))
+    assert results == [None, True]
+    assert pool.check("holds")
+    pool.close()
+
+
+def test_timeout_replaces_the_worker(fake_nuxmv):
+    pool = NuXmvPool(size=1, timeout=1)
+
+    with pytest.raises(NuXmvTimeout):
+        pool.check("hangs")
+    assert pool.check("holds")
+    pool.close()
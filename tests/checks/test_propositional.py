@@ -0,0 +1,34 @@
+import pytest
+
+from checks.propositional import check_propositional, USE_PROPOSITIONAL_FAST_PATH
+from checks.syntax import parse, is_temporal, atoms, LTLSyntaxError
+
+
+def test_parse():
+    assert str(parse("a & b | c")) == "((a & b) | c)"
+    assert str(parse("a -> b -> c")) == "(a -> (b -> c))"
+    assert str(parse("G(F(go_entrace))")) == "G(F(go_entrace))"
+    assert str(parse("(x > 5 & !y)")) == "((x > 5) & !(y))"
+    assert str(parse("!p U r")) == "(!(p) U r)"
+
+    with pytest.raises(LTLSyntaxError):
+        parse("(a & b")
+
+
+def test_temporal_and_atoms():
+    assert is_temporal(parse("G((day) -> F(a))"))
+    assert not is_temporal(parse("(day & !night) -> a"))
+    assert atoms(parse("G(F(a) & x >= 3 & a)")) == ["a", "x"]
+
+
+@pytest.mark.skipif(not USE_PROPOSITIONAL_FAST_PATH, reason="z3 is not installed")
+def test_propositional_checks():
+    booleans = ["day: boolean", "night: boolean"]
+
+    assert check_propositional(booleans, "(day & !night) -> day") is True
+    assert check_propositional(booleans, "day -> night") is False
+    assert check_propositional(booleans + ["x: 0..100"], "x > 5 -> x >= 6") is True
+    assert check_propositional(["x: 0..100"], "x <= 100") is True
+
+    """Temporal formulas are left to nuXmv"""
+    assert check_propositional(booleans, "G(day)") is None
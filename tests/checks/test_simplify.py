@@ -0,0 +1,27 @@
+from checks.simplify import simplify_formula
+
+
+def test_constants():
+    assert simplify_formula("(TRUE & a & TRUE)") == "a"
+    assert simplify_formula("(a & FALSE) | b") == "b"
+    assert simplify_formula("!(!(a))") == "a"
+    assert simplify_formula("(TRUE -> G(a))") == "G(a)"
+    assert simplify_formula("(a -> FALSE)") == "!(a)"
+
+
+def test_duplicates_and_complements():
+    assert simplify_formula("(a & (b & a) & c)") == "(a & b & c)"
+    assert simplify_formula("(a & b & !(a))") == "FALSE"
+    assert simplify_formula("(a | !(a))") == "TRUE"
+
+
+def test_temporal():
+    assert simplify_formula("G(G(a))") == "G(a)"
+    assert simplify_formula("(G(a) & b & G(c))") == "(G(a & c) & b)"
+    assert simplify_formula("(F(a) | F(b))") == "F(a | b)"
+    assert simplify_formula("G((TRUE) -> (a -> b))") == "G(a -> b)"
+    assert simplify_formula("(TRUE U a)") == "F(a)"
+
+
+def test_unparsable():
+    assert simplify_formula("a &") == "a &"
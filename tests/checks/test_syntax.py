@@ -0,0 +1,59 @@
+import copy
+import pickle
+
+from checks.syntax import parse, Node, Operator, Atom, canonical, size
+from typescogomo.formula import LTL
+from typescogomo.variables import extract_variable, Variables, Boolean
+
+
+def test_hash_consing():
+    a = parse("G((day & !night) -> F(a))")
+    b = parse("G( ( day&!night ) -> F a )")
+
+    assert a is b
+    assert hash(a) == hash(b)
+    assert a is not parse("G((day & night) -> F(a))")
+
+    """Copies and pickles are the interned node"""
+    assert copy.deepcopy(a) is a
+    assert pickle.loads(pickle.dumps(a)) is a
+
+
+def test_flattening():
+    assert parse("(a & b) & c") is parse("a & (b & c)")
+    assert Operator("&", Atom("a"), parse("b & c")) is parse("a & b & c")
+    assert str(parse("a & b & c")) == "(a & b & c)"
+
+    """Repeated operands are removed"""
+    assert Operator("&", parse("shop & day_time"), parse("day_time & entrance")) is \
+           parse("shop & day_time & entrance")
+    assert Operator("|", Atom("a"), Atom("a")) is Atom("a")
+
+
+def test_canonical():
+    assert canonical("((a) -> (b))") == "(a -> b)"
+    assert canonical("G(!(a))") == "G(!(a))"
+    assert canonical("not a formula {") == "not a formula {"
+
+
+def test_extract_variable():
+    variables = extract_variable("G(x > 5 -> F(a)) & time = 3")
+    assert [v.name for v in variables.list] == ["x", "a", "time"]
+    assert [v.basic_type for v in variables.list] == ["0..100", "boolean", "0..24"]
+
+    """Variables ordered with other variables are integers, the ones compared with booleans are booleans"""
+    variables = extract_variable("G(x > y) & (a = b) & (z = x) & (c != TRUE)")
+    assert {v.name: v.basic_type for v in variables.list} == \
+           {"x": "0..100", "y": "0..100", "a": "boolean", "b": "boolean", "z": "0..100", "c": "boolean"}
+
+
+def test_unparsable_formula():
+    ltl = LTL("a ? b : c", Variables([Boolean("a"), Boolean("b"), Boolean("c")]))
+    assert ltl.formula == "a ? b : c"
+    assert str(Operator("&", ltl.tree, Atom("d"))) == "((a ? b : c) & d)"
+    assert [v.name for v in LTL("a == b").variables.list] == ["a", "b"]
+
+
+def test_size():
+    assert size(parse("a")) == 1
+    assert size(parse("G(a -> b) & F c")) == 7
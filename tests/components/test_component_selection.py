@@ -1,6 +1,7 @@
 from src.contracts.operations import compose_contracts
 from src.components.operations import *
 from src.contracts.contract import *
+from typescogomo.variables import extract_variable, BoundedNat
 
 
 def test_component_selection():
@@ -47,3 +48,150 @@ def test_component_selection():
     #                                                       LTL("(o -> a)"),
     #                                                       LTL("(b & x > 3 -> y > 40)"),
     #                                                       LTL("(l -> p)")])
+
+
+def test_minimal_covers():
+    component_library = ComponentsLibrary(name="covers")
+
+    component_library.add_components(
+        [
+            SimpleComponent(component_id="c_a",
+                            guarantees=["a"]),
+            SimpleComponent(component_id="c_b",
+                            guarantees=["b"]),
+            SimpleComponent(component_id="c_ab",
+                            assumptions=["x"],
+                            guarantees=["a", "b"]),
+        ]
+    )
+
+    specification = SimpleContract(guarantees=["a", "b"])
+
+    candidates = component_library.extract_selection(specification.assumptions, specification.guarantees)
+
+    """c_a and c_b cost less than c_ab, the compositions that include a smaller one are not candidates"""
+    ids = sorted(sorted(c.id for c in candidate) for candidate in candidates)
+    assert ids == [["c_a", "c_b"]]
+
+    specification = SimpleContract(guarantees=["a"])
+
+    candidates = component_library.extract_selection(specification.assumptions, specification.guarantees)
+
+    ids = sorted(sorted(c.id for c in candidate) for candidate in candidates)
+    assert ids == [["c_a"]]
+
+
+def test_candidates_for():
+    component_library = ComponentsLibrary(name="index",
+                                          components=[
+                                              SimpleComponent(component_id="c_a",
+                                                              guarantees=["a"]),
+                                              SimpleComponent(component_id="c_b",
+                                                              assumptions=["a"],
+                                                              guarantees=["b"]),
+                                              SimpleComponent(component_id="c_y",
+                                                              guarantees=["y > 10"])
+                                          ])
+
+    assert [c.id for c in component_library.candidates_for(LTL("a", extract_variable("a")))] == ["c_a"]
+    assert [c.id for c in component_library.candidates_for(LTL("y > 5", extract_variable("y > 5")))] == ["c_y"]
+
+    formula = LTL("b", extract_variable("b"))
+    pairs = [(formula, c) for c in component_library.candidates_for(formula)]
+    assert component_library.provides(pairs) == [True]
+    assert component_library.provides(pairs) == [True]
+
+
+def test_library_snapshot(tmp_path):
+    def components():
+        return [SimpleComponent(component_id="c_a",
+                                guarantees=["a"]),
+                SimpleComponent(component_id="c_b",
+                                assumptions=["a"],
+                                guarantees=["b"])]
+
+    component_library = ComponentsLibrary(name="snapshot", components=components())
+    specification = SimpleContract(guarantees=["b"])
+    candidates = component_library.extract_selection(specification.assumptions, specification.guarantees)
+
+    snapshot = str(tmp_path / "library.pickle")
+    component_library.save(snapshot)
+
+    loaded = ComponentsLibrary.load(snapshot)
+    assert [c.id for c in loaded.components] == ["c_a", "c_b"]
+    assert loaded.relations == component_library.relations
+    assert [[c.id for c in candidate]
+            for candidate in loaded.extract_selection(specification.assumptions, specification.guarantees)] == \
+           [[c.id for c in candidate] for candidate in candidates]
+
+    rebuilt = ComponentsLibrary(name="snapshot", components=components())
+    assert rebuilt.restore(snapshot)
+    assert rebuilt.relations == component_library.relations
+
+    changed = ComponentsLibrary(name="snapshot", components=components()[:1])
+    assert not changed.restore(snapshot)
+    assert changed.relations["provides"] == {}
+
+
+def test_greedy_selection():
+    weaker = SimpleComponent(component_id="c_weaker",
+                             assumptions=["a & c"],
+                             guarantees=["b"])
+    stronger = SimpleComponent(component_id="c_stronger",
+                               assumptions=["a"],
+                               guarantees=["b"])
+    expensive = SimpleComponent(component_id="c_expensive",
+                                assumptions=["a", "c"],
+                                guarantees=["b"])
+
+    assert greedy_selection([[expensive], [weaker], [stronger]]) == [stronger]
+    assert greedy_selection([[stronger], [weaker]]) == [stronger]
+
+
+def test_covers_extended_for_the_ports():
+    robot_2 = Component(component_id="robot_2",
+                        guarantees=Guarantees(Guarantee(
+                            formula="a_name >= 8",
+                            variables=Variables(BoundedNat(port_type="a", name="a_name")))))
+    robot_3 = Component(component_id="robot_3",
+                        guarantees=Guarantees(Guarantee(
+                            formula="a >= 9",
+                            variables=Variables(BoundedNat("a")))))
+    component_library = ComponentsLibrary(name="ports", components=[robot_2, robot_3])
+
+    """Two variables of port type 'a' are needed, each robot has only one"""
+    assumptions = Assumptions([
+        Assumption(formula="a1 > 5", variables=Variables(BoundedNat(port_type="a", name="a1"))),
+        Assumption(formula="a2 > 5", variables=Variables(BoundedNat(port_type="a", name="a2")))])
+
+    candidates = component_library.extract_selection(Assumptions(), assumptions)
+    assert [sorted(c.id for c in candidate) for candidate in candidates] == [["robot_2", "robot_3"]]
+
+
+def test_provides_depends_on_the_ports():
+    robot = Component(component_id="robot",
+                      guarantees=Guarantees(Guarantee(
+                          formula="power >= 8",
+                          variables=Variables(BoundedNat(port_type="robot_power", name="power")))))
+    component_library = ComponentsLibrary(name="signatures", components=[robot])
+
+    same_port = LTL("x > 5", Variables(BoundedNat(port_type="robot_power", name="x")))
+    other_port = LTL("x > 5", Variables(BoundedNat(port_type="weight_power", name="x")))
+
+    """Same formula, different port types: the verdict of the first is not reused for the second"""
+    assert component_library.provides([(same_port, robot)]) == [True]
+    assert component_library.provides([(other_port, robot)]) == [False]
+
+
+def test_snapshot_with_other_keys(tmp_path, monkeypatch):
+    import src.components.components as components_module
+
+    component_library = ComponentsLibrary(name="keys", components=[SimpleComponent(component_id="c_a",
+                                                                                   guarantees=["a"])])
+    snapshot = str(tmp_path / "library.pickle")
+    component_library.save(snapshot)
+
+    monkeypatch.setattr(components_module, "RELATIONS_KEYS", "other keys")
+    assert ComponentsLibrary.load(snapshot) is None
+    assert not ComponentsLibrary(name="keys", components=[SimpleComponent(component_id="c_a",
+                                                                          guarantees=["a"])]).restore(snapshot)
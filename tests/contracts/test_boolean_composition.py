@@ -48,7 +48,7 @@ def test_three_contracts_composition():
 
     contract_composed = compose_contracts(three_boolean_contracts)
 
-    assert str(contract_composed.assumptions) == "((a & c) & e)"
+    assert str(contract_composed.assumptions) == "(a & c & e)"
 
 
 
@@ -0,0 +1,19 @@
+import pytest
+
+import typescogomo.formula as formula_module
+from src.contracts.contract import SimpleContract
+from typescogomo.formula import InconsistentException
+
+
+def test_inconsistent_guarantees(monkeypatch):
+
+    def check_satisfiability(variables, formula):
+        return "(x > 5) & (x < 3)" not in formula
+
+    monkeypatch.setattr(formula_module, "check_satisfiability", check_satisfiability)
+
+    """The assumptions are TRUE, the guarantees are checked anyway"""
+    with pytest.raises(InconsistentException):
+        SimpleContract(guarantees=["x > 5 & x < 3"])
+
+    SimpleContract(guarantees=["x > 5"])
@@ -0,0 +1,84 @@
+import controller.synthesis as synthesis
+from checks.cache import ResultCache
+from controller.synthesis import synthesis_key, get_controller, is_realizable, strix_formula
+from goals.helpers import generate_controller_input_text
+from helper.tools import save_to_file
+
+
+def test_synthesis_key():
+    key_a = synthesis_key("G(a -> b)", "a, c", "b")
+    key_b = synthesis_key("G(a  -> b)", "c,a", " b")
+    key_c = synthesis_key("G(a -> b)", "a", "b, c")
+
+    assert key_a == key_b
+    assert key_a != key_c
+
+
+def test_strix_formula():
+    """The constants are converted, the identifiers containing them are not"""
+    assert strix_formula("G(TRUE_pos)", "F(isFALSE) & G(TRUE)") == "(G(TRUE_pos) -> F(isFALSE))"
+
+
+def test_strix_runs_once(monkeypatch):
+    monkeypatch.setattr(synthesis, "strix_cache", ResultCache("test_strix", persistent=False))
+    calls = []
+
+    def strix(command, **kwargs):
+        calls.append(command)
+        return "REALIZABLE\ndigraph {\n}\n"
+
+    monkeypatch.setattr(synthesis.subprocess, "check_output", strix)
+
+    controller, exec_time = get_controller("G(a)", "G(b)", "a", "b")
+    assert controller == "digraph{}"
+    assert get_controller("G a", "G b", "a", "b") == (controller, exec_time)
+    assert is_realizable("G(a)", "G(b)", "a", "b")
+    assert len(calls) == 1
+
+
+def _specification(tmp_path, guarantees: str) -> str:
+    file_path = str(tmp_path / "specification.txt")
+    save_to_file(generate_controller_input_text(["G(a)"], [guarantees], ["a"], ["b"]), file_path)
+    return file_path
+
+
+def test_unrealizable_skips_controller(tmp_path, monkeypatch):
+    monkeypatch.setattr(synthesis, "strix_cache", ResultCache("test_strix", persistent=False))
+    calls = []
+
+    def strix(command, **kwargs):
+        calls.append(command[0])
+        return "UNREALIZABLE\n"
+
+    monkeypatch.setattr(synthesis.subprocess, "check_output", strix)
+
+    realizable, _ = synthesis.create_controller_if_exists(_specification(tmp_path, "G(a -> b)"))
+    assert not realizable
+    assert len(calls) == 1 and "--realizability" in calls[0]
+    assert [phase for phase, _ in synthesis.synthesis_phases(str(tmp_path / "specification.txt"))] == \
+           ["PRECHECK", "REALIZABILITY"]
+
+    """The guarantees are not satisfiable, strix is not called"""
+    realizable, _ = synthesis.create_controller_if_exists(_specification(tmp_path, "G(b & !b)"))
+    assert not realizable
+    assert len(calls) == 1
+
+
+def test_strix_counts(monkeypatch):
+    monkeypatch.setattr(synthesis, "strix_cache", ResultCache("test_strix", persistent=False))
+    monkeypatch.setattr(synthesis, "strix_counts", {"calls": 0, "cache_hits": 0})
+
+    def strix(command, **kwargs):
+        if "--realizability" in command[0]:
+            return "REALIZABLE\n"
+        return "REALIZABLE\ndigraph {\n}\n"
+
+    monkeypatch.setattr(synthesis.subprocess, "check_output", strix)
+
+    """The entry of the realizability has no controller, strix builds it"""
+    assert is_realizable("G(a)", "G(b)", "a", "b")
+    get_controller("G(a)", "G(b)", "a", "b")
+    assert synthesis.strix_counts == {"calls": 2, "cache_hits": 0}
+
+    get_controller("G(a)", "G(b)", "a", "b")
+    assert synthesis.strix_counts == {"calls": 2, "cache_hits": 1}
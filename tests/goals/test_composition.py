@@ -76,4 +76,4 @@ def test_three_contracts_composition():
 
     print(goal_composed)
 
-    assert str(goal_composed.get_ltl_assumptions()) == "((a & c) & e)"
+    assert str(goal_composed.get_ltl_assumptions()) == "(a & c & e)"
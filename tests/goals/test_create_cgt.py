@@ -0,0 +1,48 @@
+import time
+
+import pytest
+
+import goals.operations as operations
+import helper.parallel as parallel
+from goals.operations import create_cgt, CGTTimeoutException
+from src.goals.cgtgoal import CGTGoal
+from src.contracts.contract import BooleanContract
+from typescogomo.assumption import Context
+
+
+def slow_cluster(goals):
+    if goals[0].name == "slow":
+        time.sleep(30)
+    return goals[0]
+
+
+def test_timed_out_cluster(monkeypatch):
+    monkeypatch.setattr(operations, "compose_cluster", slow_cluster)
+    monkeypatch.setattr(parallel, "JOB_TIMEOUT", 1)
+    context_goals = {
+        Context(formula="day"): [CGTGoal(name="fast", contracts=[BooleanContract(["a"], ["b"])])],
+        Context(formula="!day"): [CGTGoal(name="slow", contracts=[BooleanContract(["c"], ["d"])])],
+    }
+
+    timed_out = []
+    cgt = create_cgt(context_goals, compose_with_context=False, workers=2, timed_out=timed_out)
+    assert [g.name for g in cgt.refined_by] == ["fast"]
+    assert [[g.name for g in goals] for _, goals in timed_out] == [["slow"]]
+
+    with pytest.raises(CGTTimeoutException):
+        create_cgt(context_goals, compose_with_context=False, workers=2)
+
+
+def test_failed_cluster(monkeypatch, caplog):
+    a = CGTGoal(name="a", contracts=[BooleanContract(["a"], ["b"])])
+    b = CGTGoal(name="b", contracts=[BooleanContract(["c"], ["d"])])
+
+    def composition(goals):
+        raise operations.CGTFailException(failed_operation="composition", faild_motivation="inconsistent",
+                                          goals_involved_a=[goals[0]], goals_involved_b=[goals[1]])
+
+    monkeypatch.setattr(operations, "composition", composition)
+    caplog.set_level("WARNING")
+    assert operations.compose_cluster([a, b]) is None
+    assert "inconsistent" in caplog.text
+    assert "['b']" in caplog.text
@@ -0,0 +1,27 @@
+from checks.nusmv import check_satisfiability, check_many, SATISFIABILITY
+from helper.profiling import profiler, profiled, NO_OPERATION
+
+
+@profiled("test_operation")
+def _operation():
+    return check_satisfiability(["a: boolean", "b: boolean"], ["G(a)", "G(!a | b)"])
+
+
+def test_calls_are_attributed_to_the_operation():
+    profiler.clear()
+    assert _operation()
+    assert profiler.stats[("test_operation", "bdd")][0] == 1
+    assert "test_operation" in profiler.report()
+
+
+@profiled("test_concurrent_operation")
+def _concurrent_operation():
+    queries = [(SATISFIABILITY, ["a: boolean"], "G(a)"), (SATISFIABILITY, ["b: boolean"], "G(b)")]
+    return check_many(queries, workers=2)
+
+
+def test_calls_in_threads_are_attributed_to_the_operation():
+    profiler.clear()
+    assert _concurrent_operation() == [True, True]
+    assert profiler.stats[("test_concurrent_operation", "bdd")][0] == 2
+    assert all(operation != NO_OPERATION for operation, _ in profiler.stats)
@@ -0,0 +1,36 @@
+import time
+
+import helper.sweep as sweep_module
+from helper.sweep import sweep
+from src.goals.cgtgoal import CGTGoal
+from src.contracts.contract import BooleanContract
+
+
+def realizable(job):
+    return True, False, 0.0
+
+
+def slow_subset(job):
+    goals, _, _ = job
+    if [g.name for g in goals] == ["g2"] and not time.time() > slow_subset.resumed_after:
+        time.sleep(30)
+    return {"rnc": True}
+
+
+def test_resume_timed_out_subsets(monkeypatch, tmp_path):
+    monkeypatch.setattr(sweep_module, "goal_realizability", realizable)
+    monkeypatch.setattr(sweep_module, "run_subset", slow_subset)
+    slow_subset.resumed_after = float("inf")
+
+    goals = [CGTGoal(name="g1", contracts=[BooleanContract(["a"], ["b"])]),
+             CGTGoal(name="g2", contracts=[BooleanContract(["c"], ["d"])])]
+
+    records = sweep(goals, str(tmp_path), workers=2, timeout=1)
+    assert [(r["goals"], r["failed"], r["timeout"]) for r in records] == [(["g1"], False, False),
+                                                                           (["g2"], False, True)]
+
+    """Only the subset that timed out is run again"""
+    slow_subset.resumed_after = 0
+    records = sweep(goals, str(tmp_path), workers=2, timeout=1, resume=True)
+    assert [(r["goals"], r["timeout"], r.get("rnc")) for r in records] == [(["g1"], False, True),
+                                                                           (["g2"], False, True)]